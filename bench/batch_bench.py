@@ -0,0 +1,60 @@
+"""
+批量匹配基准测试（无需OCR模型/GUI）
+
+用法:
+    python -m bench.batch_bench [--size 12000] [--batch 16] [--rounds 20]
+
+对比三种方式匹配同一批OCR文本的耗时并校验结果一致：
+逐条线性扫描(find_best_match_simple)、逐条索引匹配(AnswerBank.match)、
+批量矩阵匹配(AnswerBank.match_batch)。
+"""
+import argparse
+import random
+import statistics
+import time
+from core.answer_bank import AnswerBank
+from core.matcher import find_best_match_simple
+from bench.ngram_bench import load_seed_questions, build_corpus, mutate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=12000)
+    parser.add_argument('--batch', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seeds = load_seed_questions()
+    corpus, alphabet = build_corpus(seeds, args.size, rng)
+    bank = AnswerBank(corpus)
+    # 只比较模糊匹配本身，关闭会改变结果的拼音快速路径和结果缓存
+    bank.pinyin_enabled = False
+    bank.cache.resize(0)
+    batches = [[mutate(rng.choice(seeds), rng, alphabet, rng.randint(0, 2)) for _ in range(args.batch)]
+               for _ in range(args.rounds)]
+
+    methods = {
+        "逐条线性扫描": lambda qs: [find_best_match_simple(corpus, q) for q in qs],
+        "逐条索引匹配": lambda qs: [bank.match(q) for q in qs],
+        "批量矩阵匹配": lambda qs: bank.match_batch(qs, workers=args.workers),
+    }
+    print(f"条目数: {len(corpus)}，每批 {args.batch} 条，共 {args.rounds} 批")
+    reference = None
+    for name, fn in methods.items():
+        costs, outputs = [], []
+        for qs in batches:
+            start = time.perf_counter()
+            outputs.append(fn(qs))
+            costs.append((time.perf_counter() - start) * 1000)
+        if reference is None:
+            reference = outputs
+        mismatches = sum(1 for a, b in zip(outputs, reference) for x, y in zip(a, b) if x != y)
+        print(f"{name}: 每批平均 {statistics.mean(costs):.3f}ms  "
+              f"单条摊销 {statistics.mean(costs) / args.batch:.3f}ms  结果不一致: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
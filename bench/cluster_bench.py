@@ -0,0 +1,98 @@
+"""
+未匹配问题聚类基准测试（无需OCR模型/GUI）
+
+用法:
+    python -m bench.cluster_bench [--sizes 10000,100000,300000] [--questions 20000] [--check 5000]
+
+以 data/ 下的真实题目为种子生成指定数量的不同题目，按近似Zipf分布抽取出现次数，
+每次出现以一定概率带OCR错字，拼成指定行数的未匹配日志，
+分别统计 count_variants / cluster / drop_known 的耗时，看日志变大时是否近线性增长。
+--check 指定的行数下，再用逐中心 top_k 的旧写法聚一次，校验两者结果一致。
+"""
+import argparse
+import random
+import time
+import numpy as np
+from rapidfuzz import utils
+from bench.ngram_bench import load_seed_questions, mutate
+from core.ngram_index import NgramIndex
+from core.unmatched_clusters import cluster, count_variants, drop_known, medoid
+
+
+def build_questions(seeds, n, rng, alphabet):
+    questions = list(seeds[:n])
+    while len(questions) < n:
+        base = rng.choice(seeds)
+        questions.append(mutate(base, rng, alphabet, max(1, len(base) // 3)))
+    return questions
+
+
+def build_journal(questions, lines, rng, alphabet, noise):
+    # 第 i 道题的权重约为 1/(i+1)，少数题反复出现，大多数题只出现几次
+    weights = [1.0 / (i + 1) for i in range(len(questions))]
+    picks = rng.choices(questions, weights=weights, k=lines)
+    return [mutate(q, rng, alphabet, rng.randint(1, 3)) if rng.random() < noise else q for q in picks]
+
+
+def cluster_top_k(counts, threshold=80):
+    """旧写法：每个中心对整个索引做一次 top_k，只用于校验"""
+    keys = [k for k, _ in counts.most_common()]
+    index = NgramIndex(keys)
+    assigned = np.zeros(len(keys), dtype=bool)
+    clusters = []
+    for center in range(len(keys)):
+        if assigned[center]:
+            continue
+        members = [i for i, _ in index.top_k(keys[center], len(keys), threshold) if not assigned[i]]
+        if center not in members:
+            members.append(center)
+        assigned[members] = True
+        variants = [keys[i] for i in sorted(members)]
+        clusters.append({"q": medoid(variants), "count": sum(counts[v] for v in variants), "variants": variants})
+    clusters.sort(key=lambda c: -c["count"])
+    return clusters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,300000', help='日志行数，逗号分隔')
+    parser.add_argument('--questions', type=int, default=20000, help='不同题目数')
+    parser.add_argument('--noise', type=float, default=0.5, help='每行带OCR错字的概率')
+    parser.add_argument('--threshold', type=float, default=80)
+    parser.add_argument('--check', type=int, default=5000, help='在该行数下与旧写法对比，0为不对比')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seeds = load_seed_questions()
+    alphabet = sorted(set(''.join(seeds)))
+    questions = build_questions(seeds, args.questions, rng, alphabet)
+    bank_keys = [utils.default_process(q) for q in seeds]
+
+    for size in (int(s) for s in args.sizes.split(',')):
+        journal = build_journal(questions, size, rng, alphabet, args.noise)
+        start = time.perf_counter()
+        counts = count_variants(journal)
+        counted = time.perf_counter()
+        clusters = cluster(counts, args.threshold)
+        clustered = time.perf_counter()
+        kept = drop_known(clusters, bank_keys)
+        done = time.perf_counter()
+        print(f"日志 {size} 行，读法 {len(counts)} 条，聚为 {len(clusters)} 类（去掉题库已有后 {len(kept)} 类）: "
+              f"计数 {counted - start:.3f}秒  聚类 {clustered - counted:.3f}秒  "
+              f"去重 {done - clustered:.3f}秒")
+
+    if args.check:
+        counts = count_variants(build_journal(questions, args.check, rng, alphabet, args.noise))
+        start = time.perf_counter()
+        expected = cluster_top_k(counts, args.threshold)
+        old_cost = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = cluster(counts, args.threshold)
+        new_cost = time.perf_counter() - start
+        print(f"校验 {args.check} 行（读法 {len(counts)} 条）: 旧写法 {old_cost:.3f}秒  当前 {new_cost:.3f}秒  "
+              f"结果{'一致' if actual == expected else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+匹配器基准测试（无需OCR模型/GUI，可在Linux无界面环境运行）
+
+用法:
+    python -m bench.matcher_bench [--queries 500] [--slow-queries 50] [--engines a,b] [--output result.json]
+
+从 data/ 下的真实题库抽题，模拟OCR噪声生成查询：替换字、丢字、插入水印、截断，
+对每种匹配实现统计 p50/p99 延迟、吞吐量和 top-1 准确率（总体及按噪声类型），以JSON输出。
+命中的条目与原题问题和答案都相同即算正确（重复收录的题目任取其一均可）。
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from core.answer_bank import AnswerBank
+from core.bank_cache import find_sources
+from core.bank_loader import parse_file
+from core.bank_shards import ShardedBank, group_sources, load_shard_config
+from core.confusion import ConfusionScorer
+from core.matcher import WATERMARK, build_index, find_best_match_simple
+from bench.ngram_bench import percentile
+
+NOISE_KINDS = ("clean", "substitute", "drop", "watermark", "truncate")
+
+
+def add_noise(text, kind, rng, alphabet):
+    """按噪声类型生成一条模拟OCR结果"""
+    chars = list(text)
+    if kind == "substitute":
+        for _ in range(max(1, len(chars) // 8)):
+            chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+    elif kind == "drop":
+        for _ in range(max(1, len(chars) // 8)):
+            if len(chars) > 2:
+                del chars[rng.randrange(len(chars))]
+    elif kind == "watermark":
+        pos = rng.randint(0, len(chars))
+        chars[pos:pos] = list(WATERMARK)
+    elif kind == "truncate":
+        chars = chars[:max(2, int(len(chars) * rng.uniform(0.5, 0.8)))]
+    return ''.join(chars)
+
+
+def build_queries(entries, count, rng):
+    alphabet = sorted(set(''.join(e['q'] for e in entries)))
+    queries = []
+    for n in range(count):
+        kind = NOISE_KINDS[n % len(NOISE_KINDS)]
+        expected = rng.choice(entries)
+        queries.append((add_noise(expected['q'], kind, rng, alphabet), kind, expected))
+    return queries
+
+
+def build_engines(entries, data_dir, workdir):
+    """返回 {名称: (匹配函数, 是否较慢)}，依赖缺失的实现记录跳过原因"""
+    engines, skipped = {}, {}
+    try:
+        import main
+        engines["main.find_best_match"] = (lambda q: main.find_best_match(entries, q), True)
+    except ImportError as e:
+        skipped["main.find_best_match"] = str(e)
+    engines["find_best_match_simple"] = (lambda q: find_best_match_simple(entries, q), True)
+    index = build_index(entries)
+    engines["find_best_match_simple+index"] = (lambda q: find_best_match_simple(entries, q, index=index), False)
+
+    # 按需构建的索引都在计时前建好（与GUI加载时一致），不计入第一条查询的延迟
+    bank = AnswerBank(entries)
+    bank.cache.resize(0)
+    bank.prepare()
+    engines["AnswerBank"] = (bank.match, False)
+    edit_bank = AnswerBank(entries)
+    edit_bank.cache.resize(0)
+    edit_bank.edit_distance = 2
+    edit_bank.prepare()
+    engines["AnswerBank+edit"] = (edit_bank.match, False)
+    confusion_bank = AnswerBank(entries)
+    confusion_bank.cache.resize(0)
+    confusion_bank.scorer = ConfusionScorer()
+    confusion_bank.prepare()
+    engines["AnswerBank+confusion"] = (confusion_bank.match, False)
+
+    config = load_shard_config(data_dir)
+    shards = {}
+    for shard, sources in group_sources(find_sources(data_dir), config).items():
+        shards[shard] = AnswerBank([e for src in sources for e in parse_file(src)])
+        shards[shard].cache.resize(0)
+    sharded = ShardedBank(shards, config)
+    sharded.prepare()
+    engines["ShardedBank(global)"] = (sharded.match, False)
+
+    try:
+        from core.sqlite_bank import SqliteBank, import_sources
+        db_path = os.path.join(workdir, "bench.db")
+        import_sources(db_path, find_sources(data_dir))
+        sqlite_bank = SqliteBank(db_path)
+        sqlite_bank.cache.resize(0)
+        sqlite_bank.prepare()
+        engines["SqliteBank"] = (sqlite_bank.match, False)
+    except Exception as e:  # 部分平台的SQLite未编译FTS5
+        skipped["SqliteBank"] = str(e)
+    return engines, skipped
+
+
+def run_engine(fn, queries):
+    costs, correct, by_kind = [], 0, {kind: [0, 0] for kind in NOISE_KINDS}
+    start_all = time.perf_counter()
+    for query, kind, expected in queries:
+        start = time.perf_counter()
+        result = fn(query)
+        costs.append((time.perf_counter() - start) * 1000)
+        ok = result is not None and result['q'] == expected['q'] and result['ans'] == expected['ans']
+        correct += ok
+        by_kind[kind][0] += ok
+        by_kind[kind][1] += 1
+    elapsed = time.perf_counter() - start_all
+    return {
+        "queries": len(queries),
+        "mean_ms": round(statistics.mean(costs), 4),
+        "p50_ms": round(percentile(costs, 50), 4),
+        "p99_ms": round(percentile(costs, 99), 4),
+        "throughput_qps": round(len(queries) / elapsed, 1),
+        "top1_accuracy": round(correct / len(queries), 4),
+        "accuracy_by_noise": {kind: round(ok / total, 4) for kind, (ok, total) in by_kind.items() if total},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--slow-queries', type=int, default=50, help='线性扫描等较慢的实现只跑前这么多条')
+    parser.add_argument('--engines', default='', help='逗号分隔，只运行这些实现')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='', help='结果JSON写入文件，默认输出到标准输出')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="matcher_bench_")
+    # 加载过程的日志转到标准错误，标准输出只留JSON结果
+    with contextlib.redirect_stdout(sys.stderr):
+        entries = [e for src in find_sources(args.data) for e in parse_file(src)]
+        queries = build_queries(entries, args.queries, rng)
+        try:
+            engines, skipped = build_engines(entries, args.data, workdir)
+            selected = set(filter(None, args.engines.split(',')))
+            results = {}
+            for name, (fn, slow) in engines.items():
+                if selected and name not in selected:
+                    continue
+                print(f"运行 {name}...")
+                results[name] = run_engine(fn, queries[:args.slow_queries] if slow else queries)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "corpus_size": len(entries),
+        "queries": len(queries),
+        "noise_kinds": list(NOISE_KINDS),
+        "seed": args.seed,
+        "engines": results,
+        "skipped": skipped,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
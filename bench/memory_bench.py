@@ -0,0 +1,47 @@
+"""
+答案存储内存占用基准测试（无需OCR模型/GUI）
+
+用法:
+    python -m bench.memory_bench [--data data]
+
+用 tracemalloc 统计 data/ 下题库以 dict 列表保存与以列式 AnswerStore 保存时的内存占用，
+并校验两者内容一致。
+"""
+import argparse
+import gc
+import tracemalloc
+from core.answer_store import AnswerStore
+from core.bank_cache import find_sources
+from core.bank_loader import parse_file
+
+
+def measure(build):
+    """返回 build() 的结果及其常驻内存（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default='data')
+    args = parser.parse_args()
+
+    sources = find_sources(args.data)
+    entries, dict_bytes = measure(lambda: [e for src in sources for e in parse_file(src)])
+    store, store_bytes = measure(lambda: AnswerStore.from_entries(entries))
+    mismatches = sum(1 for i, e in enumerate(entries) if store[i] != e)
+
+    print(f"题库文件: {len(sources)}个，条目数: {len(entries)}")
+    print(f"dict 列表:   {dict_bytes / 1024:.1f} KB  (每条 {dict_bytes / len(entries):.0f} 字节)")
+    print(f"AnswerStore: {store_bytes / 1024:.1f} KB  (每条 {store_bytes / len(entries):.0f} 字节，"
+          f"其中字符串池 {len(store.pool) / 1024:.1f} KB)")
+    print(f"节省: {1 - store_bytes / dict_bytes:.1%}  内容不一致: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
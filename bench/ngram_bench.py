@@ -0,0 +1,85 @@
+"""
+倒排索引匹配基准测试（无需OCR模型/GUI）
+
+用法:
+    python -m bench.ngram_bench [--size 100000] [--queries 200]
+
+以 data/ 下的真实题目为种子，随机替换字符扩充到指定规模，
+对比线性扫描与 NgramIndex 的查询耗时（平均/p50/p99），并校验两者结果一致。
+OCR错字多、只含常见字的查询剪枝效果差，尾部延迟看 p99 而不是平均值。
+"""
+import argparse
+import random
+import statistics
+import time
+from core.bank_cache import find_sources
+from core.bank_loader import iter_entries
+from core.matcher import find_best_match_simple, build_index
+
+
+def load_seed_questions(data_dir="data"):
+    return [entry['q'] for src in find_sources(data_dir) for entry in iter_entries(src)]
+
+
+def mutate(text, rng, alphabet, n):
+    chars = list(text)
+    for _ in range(n):
+        if not chars:
+            break
+        chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+    return ''.join(chars)
+
+
+def build_corpus(seeds, size, rng):
+    alphabet = sorted(set(''.join(seeds)))
+    corpus = [{'q': q, 'ans': ''} for q in seeds]
+    while len(corpus) < size:
+        base = rng.choice(seeds)
+        corpus.append({'q': mutate(base, rng, alphabet, max(1, len(base) // 3)), 'ans': ''})
+    return corpus, alphabet
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed(fn, queries):
+    costs, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(fn(q))
+        costs.append((time.perf_counter() - start) * 1000)
+    return costs, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--linear-queries', type=int, default=20, help='线性扫描较慢，只抽样这么多条')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seeds = load_seed_questions()
+    corpus, alphabet = build_corpus(seeds, args.size, rng)
+    queries = [mutate(rng.choice(seeds), rng, alphabet, rng.randint(0, 2)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = build_index(corpus)
+    print(f"条目数: {len(corpus)}，索引构建耗时: {time.perf_counter() - start:.3f}秒")
+
+    idx_costs, idx_results = timed(lambda q: find_best_match_simple(corpus, q, index=index), queries)
+    sample = queries[:args.linear_queries]
+    lin_costs, lin_results = timed(lambda q: find_best_match_simple(corpus, q), sample)
+
+    mismatches = sum(1 for a, b in zip(idx_results, lin_results) if a is not b)
+    for name, costs in (("线性扫描", lin_costs), ("倒排索引", idx_costs)):
+        print(f"{name}: 平均 {statistics.mean(costs):.3f}ms  p50 {percentile(costs, 50):.3f}ms  "
+              f"p99 {percentile(costs, 99):.3f}ms  ({len(costs)}次)")
+    print(f"结果不一致: {mismatches}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+批量OCR基准测试（需要 paddleocr）
+
+用法:
+    python -m bench.ocr_batch_bench [--frames 截图目录] [--regions 4] [--rounds 10] [--reuse-layout]
+
+每轮取 regions 张截图作为同时监视的多个区域，对比逐张 do_ocr_ext 与一次 do_ocr_batch 的耗时，
+输出每个区域的分摊耗时和两种方式识别文本的一致率。
+截图目录中的 png/jpg 按文件名排序读取（录制的游戏截图），未指定时用合成的文字图片。
+"""
+import argparse
+import os
+import statistics
+import time
+import cv2
+import numpy as np
+from core.ocr import Ocr
+
+FRAME_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def load_frames(path, limit=None):
+    """读取录制的截图，转为与 WindowHandler 截图相同的RGB数组"""
+    files = sorted(f for f in os.listdir(path) if f.lower().endswith(FRAME_EXTS))[:limit]
+    frames = []
+    for name in files:
+        img = cv2.imread(os.path.join(path, name))
+        if img is not None:
+            frames.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def synthetic_frames(count, rng):
+    """合成问题区域大小的文字图片（cv2 只能写ASCII）"""
+    frames = []
+    for _ in range(count):
+        img = np.full((160, 527, 3), 235, dtype=np.uint8)
+        for line in range(rng.integers(1, 3) + 1):
+            text = "".join(rng.choice(list("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789 "), size=rng.integers(8, 20)))
+            cv2.putText(img, text, (15, 45 + 45 * line), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (20, 20, 20), 2)
+        frames.append(img)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', default='', help='录制的截图目录')
+    parser.add_argument('--regions', type=int, default=4, help='每批区域数')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--reuse-layout', action='store_true', help='开启检测框复用')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    count = args.regions * args.rounds
+    frames = load_frames(args.frames, count) if args.frames else synthetic_frames(count, np.random.default_rng(args.seed))
+    if len(frames) < args.regions:
+        raise SystemExit(f"截图不足 {args.regions} 张")
+    batches = [frames[i:i + args.regions] for i in range(0, len(frames) - args.regions + 1, args.regions)]
+
+    single, batched = Ocr(reuse_layout=args.reuse_layout), Ocr(reuse_layout=args.reuse_layout)
+    single.warm_up()
+    batched.warm_up()
+
+    costs = {"逐张do_ocr_ext": [], "do_ocr_batch": []}
+    same = total = 0
+    for batch in batches:
+        start = time.perf_counter()
+        texts_single = [single.do_ocr_ext(img, simple=True) for img in batch]
+        costs["逐张do_ocr_ext"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        texts_batch = batched.do_ocr_batch(batch, simple=True)
+        costs["do_ocr_batch"].append((time.perf_counter() - start) * 1000)
+        same += sum(''.join(a) == ''.join(b) for a, b in zip(texts_single, texts_batch))
+        total += len(batch)
+
+    print(f"{len(batches)}批 x {args.regions}个区域，检测框复用: {'开' if args.reuse_layout else '关'}")
+    for name, values in costs.items():
+        per_batch = statistics.mean(values)
+        print(f"{name:<16} 每批 {per_batch:8.1f}ms  每区域分摊 {per_batch / args.regions:7.1f}ms")
+    print(f"识别文本一致率: {same / total:.1%}")
+    if args.reuse_layout:
+        print(f"检测框复用: 逐张 {single.layout_stats}，批量 {batched.layout_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+OCR截图预处理基准测试（需要 paddleocr）
+
+用法:
+    python -m bench.ocr_preprocess_bench [--frames 截图目录] [--count 50] [--presets none,gray,...] [--text-height 32]
+
+对每个预处理预设（core.ocr_preprocess.PRESETS）逐张识别同一批截图，统计预处理耗时、总耗时（p50/p99），
+以不做预处理（none）的结果为基准计算识别文本一致率、字符相似度和题库匹配一致率（匹配到同一条目），
+最后给出匹配一致率不低于 --min-agreement 的最快预设。
+匹配一致率只对录制的游戏截图有意义，合成的文字图片匹配不到题库，只看文本指标。
+"""
+import argparse
+import contextlib
+import statistics
+import sys
+import time
+import numpy as np
+from rapidfuzz import fuzz
+from core.answer_bank import AnswerBank
+from core.bank_cache import find_sources
+from core.bank_loader import parse_file
+from core.ocr import Ocr
+from core.ocr_preprocess import PRESETS, Preprocessor
+from bench.ngram_bench import percentile
+from bench.ocr_batch_bench import load_frames, synthetic_frames
+
+
+def run_preset(ocr, frames):
+    """逐张识别，返回 (文本列表, 每张总耗时ms)"""
+    texts, costs = [], []
+    for img in frames:
+        start = time.perf_counter()
+        texts.append(''.join(ocr.do_ocr_ext(img, simple=True)))
+        costs.append((time.perf_counter() - start) * 1000)
+    return texts, costs
+
+
+def match_key(bank, text):
+    """匹配到的条目的(问题, 答案)，未匹配时为None"""
+    entry = bank.match(text) if text else None
+    return (entry['q'], entry['ans']) if entry else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', default='', help='录制的截图目录')
+    parser.add_argument('--count', type=int, default=50, help='最多使用的截图数')
+    parser.add_argument('--presets', default=','.join(PRESETS), help='逗号分隔的预设名')
+    parser.add_argument('--text-height', type=int, default=32, help='downscale 的目标文字行高')
+    parser.add_argument('--data', default='data', help='题库目录，用于计算匹配一致率')
+    parser.add_argument('--min-agreement', type=float, default=0.98, help='可接受的最低匹配一致率')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.count) if args.frames else synthetic_frames(args.count, np.random.default_rng(args.seed))
+    if not frames:
+        raise SystemExit("没有可用的截图")
+    presets = [name for name in args.presets.split(',') if name]
+    if "none" not in presets:
+        presets.insert(0, "none")
+    with contextlib.redirect_stdout(sys.stderr):
+        bank = AnswerBank([e for src in find_sources(args.data) for e in parse_file(src)])
+    bank.cache.resize(0)
+
+    # 同一个引擎切换预设，只加载一次模型；不复用检测框，测的是每帧完整识别的耗时
+    ocr = Ocr()
+    results = {}
+    for name in presets:
+        ocr.set_preprocess(Preprocessor.preset(name, text_height=args.text_height))
+        ocr.warm_up()
+        texts, costs = run_preset(ocr, frames)
+        results[name] = {"texts": texts, "costs": costs, "preprocess_ms": ocr.preprocess.stats()["mean_ms"],
+                         "matches": [match_key(bank, text) for text in texts]}
+
+    base = results["none"]
+    print(f"{len(frames)}张截图，目标文字行高 {args.text_height}px，基准为不做预处理（none）")
+    print(f"{'预设':<16}{'预处理ms':>10}{'p50ms':>10}{'p99ms':>10}{'文本一致':>10}{'字符相似':>10}{'匹配一致':>10}")
+    accepted = []
+    for name, res in results.items():
+        same_text = statistics.mean(a == b for a, b in zip(res["texts"], base["texts"]))
+        similarity = statistics.mean(fuzz.ratio(a, b) for a, b in zip(res["texts"], base["texts"])) / 100
+        same_match = statistics.mean(a == b for a, b in zip(res["matches"], base["matches"]))
+        p50 = percentile(res["costs"], 50)
+        print(f"{name:<16}{res['preprocess_ms']:>10.2f}{p50:>10.1f}{percentile(res['costs'], 99):>10.1f}"
+              f"{same_text:>10.1%}{similarity:>10.1%}{same_match:>10.1%}")
+        if same_match >= args.min_agreement:
+            accepted.append((p50, name))
+    best = min(accepted)[1]
+    print(f"匹配一致率不低于 {args.min_agreement:.0%} 的最快预设: {best}")
+
+
+if __name__ == "__main__":
+    main()
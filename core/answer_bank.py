@@ -0,0 +1,509 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import sys
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+from core.ngram_index import NgramIndex
+from core.answer_store import AnswerStore
+from core.matcher import (RESCORE_CANDIDATES, exact_key, joint_key, normalize_query, option_key, option_score,
+                          prefix_score)
+from core.prefix_index import PrefixIndex, unique_prefix
+from core.symspell import SymSpellIndex
+from core.match_cache import MISSING, MatchCache
+from core.pinyin_index import PINYIN_AVAILABLE, PinyinIndex, fill_pinyin, pinyin_key, to_initials_fast
+
+
+class AnswerBank:
+    """
+    编译后的答案库。
+
+    加载时对所有问题做一次归一化并驻留(intern)，同时建立倒排索引，
+    每次查询只需归一化OCR文本并对候选打分。条目保存在列式的 AnswerStore 中，
+    匹配结果是只读的 AnswerRecord 视图，按 dict 的方式取 'q'、'ans' 等字段。
+    """
+
+    # 已删除条目占比超过该值时整体重建，回收空位
+    COMPACT_RATIO = 0.5
+    # 默认缓存最近多少个不同查询的匹配结果
+    CACHE_SIZE = 256
+    # 查询长度不到编辑距离的这么多倍时不走编辑距离路径：两三个字的碎片在距离2内几乎能“命中”任何短问题
+    EDIT_MIN_LENGTH_RATIO = 3
+    # 按选项匹配时快速路径最多取这么多个候选（重复收录的同名题目）按选项重新打分
+    OPTION_CANDIDATES = 8
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = (), sources: Optional[Dict[str, List[int]]] = None) -> None:
+        """
+        参数:
+        entries (Iterable[Dict[str, Any]]): 答案条目，至少包含 'q' 和 'ans'。
+        sources (Dict[str, List[int]]): 源文件 -> 条目下标，用于热加载时按文件增量更新。
+        """
+        entries = list(entries)
+        keys = [sys.intern(utils.default_process(e['q'])) for e in entries]
+        self._setup(AnswerStore.from_entries(entries), keys, NgramIndex(keys), sources,
+                    [pinyin_key(e.get('p', '')) for e in entries])
+
+    def _setup(self, entries: AnswerStore, keys: List[str], index: NgramIndex,
+               sources: Optional[Dict[str, List[int]]], pinyin_keys: List[str]) -> None:
+        self.entries: AnswerStore = entries
+        self.keys: List[str] = keys
+        self.index = index
+        self.choices = index.keys
+        self.sources: Dict[str, List[int]] = sources or {}
+        self.pinyin_keys = pinyin_keys
+        self.pinyin_enabled = PINYIN_AVAILABLE
+        self.removed = 0
+        self._exact: Optional[Dict[str, Any]] = None
+        self._pinyin: Optional[PinyinIndex] = None
+        self._option_keys: Optional[List[str]] = None
+        self._joint: Optional[NgramIndex] = None
+        self._plain: Optional[NgramIndex] = None
+        self._prefix: Optional[PrefixIndex] = None
+        # 编辑距离引擎（SymSpell），0 表示不启用
+        self.edit_distance = 0
+        self._symspell: Optional[SymSpellIndex] = None
+        # 模糊匹配的打分函数（如 core.confusion.ConfusionScorer），None 表示QRatio，应在开始匹配前设置。
+        # 打分函数带 fold（折叠混淆字）时在折叠后的问题索引上取候选，结果与按该打分函数线性扫描一致；
+        # 否则对QRatio的前 RESCORE_CANDIDATES 名重新打分
+        self.scorer: Optional[Callable[[str, str], float]] = None
+        self._folded: Optional[NgramIndex] = None
+        self._folded_by: Optional[Callable[[str], str]] = None
+        self.cache = MatchCache(self.CACHE_SIZE)
+        self.counters = {"exact_hits": 0, "exact_misses": 0, "pinyin_hits": 0, "edit_hits": 0,
+                         "prefix_hits": 0}
+
+    @classmethod
+    def from_sources(cls, files: Dict[str, List[Dict[str, Any]]]) -> 'AnswerBank':
+        """由 {源文件: 条目列表} 构造，记录每个文件对应的条目，并为缺少 'p' 的条目生成拼音首字母"""
+        entries, sources = [], {}
+        for path, items in files.items():
+            fill_pinyin(items)
+            sources[path] = list(range(len(entries), len(entries) + len(items)))
+            entries.extend(items)
+        return cls(entries, sources)
+
+    @classmethod
+    def from_compiled(cls, entries: AnswerStore, keys: List[str], index: NgramIndex,
+                      sources: Optional[Dict[str, List[int]]] = None,
+                      pinyin_keys: Optional[List[str]] = None) -> 'AnswerBank':
+        """由预编译数据直接构造（见 core.bank_cache），跳过归一化与建索引"""
+        bank = cls.__new__(cls)
+        if pinyin_keys is None:
+            pinyin_keys = [pinyin_key(e.get('p', '')) if e else "" for e in entries]
+        bank._setup(entries, keys, index, sources, pinyin_keys)
+        return bank
+
+    def __len__(self) -> int:
+        return len(self.entries) - self.removed
+
+    def __iter__(self):
+        return (e for e in self.entries if e is not None)
+
+    def updated(self, changes: Dict[str, Optional[List[Dict[str, Any]]]]) -> 'AnswerBank':
+        """
+        按文件应用增量，写时复制地返回新答案库。
+
+        原对象不做任何修改，正在匹配的线程可以继续使用旧库，替换引用即完成切换。
+
+        参数:
+        changes (Dict[str, Optional[List[Dict[str, Any]]]]): 源文件 -> 新条目列表，None 表示文件已删除。
+
+        返回:
+        AnswerBank: 新答案库。
+        """
+        keys = list(self.keys)
+        pinyin_keys = list(self.pinyin_keys)
+        sources = dict(self.sources)
+        removed, added, added_entries = [], [], []
+        for path, items in changes.items():
+            for i in sources.pop(path, []):
+                keys[i] = ""
+                pinyin_keys[i] = ""
+                removed.append(i)
+            if items:
+                fill_pinyin(items)
+                start = len(keys)
+                new_keys = [sys.intern(utils.default_process(e['q'])) for e in items]
+                keys.extend(new_keys)
+                pinyin_keys.extend(pinyin_key(e.get('p', '')) for e in items)
+                added.extend(new_keys)
+                added_entries.extend(items)
+                sources[path] = list(range(start, len(keys)))
+
+        entries = self.entries.updated(removed, added_entries)
+        if self.removed + len(removed) > len(entries) * self.COMPACT_RATIO:
+            bank = AnswerBank.from_sources({path: [dict(entries[i]) for i in ids] for path, ids in sources.items()})
+        else:
+            bank = AnswerBank.from_compiled(entries, keys, self.index.updated(removed, added), sources, pinyin_keys)
+            bank.removed = self.removed + len(removed)
+        bank.pinyin_enabled = self.pinyin_enabled
+        bank.edit_distance = self.edit_distance
+        bank.scorer = self.scorer
+        bank.counters = dict(self.counters)
+        # 题库变化后旧结果可能失效，只沿用缓存容量
+        bank.cache = MatchCache(self.cache.maxsize)
+        # 在热加载线程里预先建好，避免切换后第一次匹配时卡顿
+        bank.prepare()
+        return bank
+
+    def prepare(self) -> None:
+        """
+        预先构建每次匹配都会用到、原本首次使用时才构建的索引（精确哈希表、前缀索引、拼音索引、编辑距离索引），
+        加载或热加载线程中调用，避免在OCR线程第一次匹配时卡顿。只在按选项匹配时用到的联合索引仍按需构建。
+        """
+        self.exact
+        self.prefix
+        if self.pinyin_enabled:
+            self.pinyin
+        if self.edit_distance:
+            self.symspell
+        if getattr(self.scorer, 'fold', None) is not None:
+            self.folded
+
+    @property
+    def exact(self) -> Dict[str, Any]:
+        """
+        精确匹配哈希表：激进归一化后的问题 -> 条目下标，首次使用时构建。
+
+        重复收录的问题对应下标列表（升序），答案不同时一起作为候选，由 score_margin 判断是否有歧义；
+        绝大多数问题只有一个条目，直接存下标以节省内存。
+        """
+        if self._exact is None:
+            exact = {}
+            for i, key in enumerate(self.keys):
+                if key:
+                    ek = exact_key(key)
+                    prev = exact.get(ek)
+                    if prev is None:
+                        exact[ek] = i
+                    elif isinstance(prev, list):
+                        prev.append(i)
+                    else:
+                        exact[ek] = [prev, i]
+            exact.pop("", None)
+            self._exact = exact
+        return self._exact
+
+    @property
+    def pinyin(self) -> PinyinIndex:
+        """拼音首字母索引，首次使用时构建"""
+        if self._pinyin is None:
+            self._pinyin = PinyinIndex(self.pinyin_keys)
+        return self._pinyin
+
+    @property
+    def option_keys(self) -> List[str]:
+        """各条目归一化后的选项，没有选项的条目为空串，首次按选项匹配时构建"""
+        if self._option_keys is None:
+            self._option_keys = [option_key(e.get('a')) if e is not None else "" for e in self.entries]
+        return self._option_keys
+
+    @property
+    def joint(self) -> NgramIndex:
+        """有选项的条目的问题+选项联合倒排索引（没有选项的条目为空串），首次按选项匹配时构建"""
+        if self._joint is None:
+            self._joint = NgramIndex([joint_key(key, opt) if opt else ""
+                                      for key, opt in zip(self.keys, self.option_keys)])
+        return self._joint
+
+    @property
+    def plain(self) -> NgramIndex:
+        """没有选项的条目的问题倒排索引（有选项的条目为空串），与 joint 合起来覆盖全部条目"""
+        if self._plain is None:
+            if any(self.option_keys):
+                self._plain = NgramIndex([key if not opt else "" for key, opt in zip(self.keys, self.option_keys)])
+            else:
+                self._plain = self.index
+        return self._plain
+
+    @property
+    def prefix(self) -> PrefixIndex:
+        """问题前缀索引，首次按前缀匹配时构建"""
+        if self._prefix is None:
+            self._prefix = PrefixIndex(self.keys)
+        return self._prefix
+
+    @property
+    def folded(self) -> NgramIndex:
+        """按 scorer.fold 折叠混淆字后的问题索引，首次使用或更换打分函数后构建"""
+        fold = self.scorer.fold
+        if self._folded is None or self._folded_by != fold:
+            self._folded = NgramIndex([fold(key) for key in self.keys])
+            self._folded_by = fold
+        return self._folded
+
+    @property
+    def symspell(self) -> SymSpellIndex:
+        """编辑距离索引，首次使用时构建"""
+        if self._symspell is None or self._symspell.max_distance != self.edit_distance:
+            self._symspell = SymSpellIndex(self.keys, self.edit_distance)
+        return self._symspell
+
+    def _lookup_exact(self, query: str, k: int) -> List[Tuple[int, float]]:
+        ids = self.exact.get(exact_key(query))
+        if ids is None:
+            self.counters["exact_misses"] += 1
+            return []
+        self.counters["exact_hits"] += 1
+        return [(i, 100.0) for i in (ids if isinstance(ids, list) else [ids])[:k]]
+
+    def _lookup_pinyin(self, query_clean: str, threshold: float, k: int) -> List[Tuple[int, float]]:
+        """
+        同音字误识别时拼音首字母不变：首字母相同取其中得分最高者，前缀只接受唯一条目。
+
+        首字母相同不代表是同一道题，得分低于 threshold 的命中一律丢弃，交给模糊匹配判断。
+        """
+        if not self.pinyin_enabled:
+            return []
+        key = pinyin_key(to_initials_fast(query_clean))
+        ids = self.pinyin.lookup(key)
+        if not ids:
+            ids = self.pinyin.prefix(key)
+            if len(ids) != 1:
+                return []
+        scored = sorted((-fuzz.QRatio(query_clean, self.keys[i]), i) for i in ids)
+        if -scored[0][0] < threshold:
+            return []
+        self.counters["pinyin_hits"] += 1
+        return [(i, -score) for score, i in scored[:k] if -score >= threshold]
+
+    def _lookup_edit(self, query_clean: str, threshold: float, k: int) -> List[Tuple[int, float]]:
+        """OCR错一两个字时按编辑距离直接定位，得分低于 threshold 的丢弃，按得分降序、同分按下标升序"""
+        if not self.edit_distance or len(query_clean) < self.EDIT_MIN_LENGTH_RATIO * self.edit_distance:
+            return []
+        hits = [(i, fuzz.QRatio(query_clean, self.keys[i])) for i, _ in self.symspell.lookup(query_clean)]
+        hits = [(i, score) for i, score in hits if score >= threshold]
+        if not hits:
+            return []
+        self.counters["edit_hits"] += 1
+        # 编辑距离小不等于QRatio高（长度不同的条目），与模糊匹配一样按得分排序，score_margin 才有意义
+        hits.sort(key=lambda h: (-h[1], h[0]))
+        return hits[:k]
+
+    def _fast_candidates(self, query: str, query_clean: str, threshold: float, k: int) -> List[Tuple[int, float]]:
+        # 干净的OCR结果在哈希表里直接命中，不必模糊打分
+        hits = self._lookup_exact(query, k)
+        if hits:
+            return hits
+        hits = self._lookup_pinyin(query_clean, threshold, k) or self._lookup_edit(query_clean, threshold, k)
+        if not hits or hits[0][1] >= 100:
+            return hits
+        # 拼音/编辑距离命中不是完全匹配时，竞争者只看该路径的候选会高估领先分（score_margin），
+        # 与模糊匹配的前k名合并后按得分排序
+        merged = dict(self._fuzzy_candidates(query_clean, threshold, k))
+        for i, score in hits:
+            merged[i] = max(score, merged.get(i, 0.0))
+        return sorted(merged.items(), key=lambda h: (-h[1], h[0]))[:k]
+
+    def _fuzzy_candidates(self, query_clean: str, threshold: float, k: int) -> List[Tuple[int, float]]:
+        """只按问题模糊匹配，设置了 scorer 时按 scorer 的得分过阈值并排序（见 _rescore_folded）"""
+        if self.scorer is None:
+            return self.index.top_k(query_clean, k, threshold)
+        if getattr(self.scorer, 'fold', None) is not None:
+            return self._rescore_folded(query_clean, threshold, k)
+        hits = [(i, self.scorer(query_clean, self.keys[i]))
+                for i, _ in self.index.top_k(query_clean, max(k, RESCORE_CANDIDATES))]
+        hits = [(i, score) for i, score in hits if score >= threshold and score > 0]
+        hits.sort(key=lambda h: (-h[1], h[0]))
+        return hits[:k]
+
+    def _rescore_folded(self, query_clean: str, threshold: float, k: int) -> List[Tuple[int, float]]:
+        """
+        在折叠混淆字后的索引上取候选，用 scorer 重新打分。
+
+        scorer 的得分介于原串QRatio和折叠后QRatio之间，折叠后QRatio是它的上界：
+        按折叠后得分从高到低取候选，直到第n名的折叠后得分低于已有的第k名 scorer 得分，
+        其余条目不可能再进入前k，结果与按 scorer 线性扫描一致。
+        """
+        folded_query = self.scorer.fold(query_clean)
+        scores: Dict[int, float] = {}
+        n = max(k, RESCORE_CANDIDATES)
+        while True:
+            candidates = self.folded.top_k(folded_query, n, threshold)
+            for i, _ in candidates:
+                if i not in scores:
+                    scores[i] = self.scorer(query_clean, self.keys[i])
+            hits = sorted(((i, score) for i, score in scores.items() if score >= threshold and score > 0),
+                          key=lambda h: (-h[1], h[0]))[:k]
+            if len(candidates) < n or (len(hits) == k and candidates[-1][1] < hits[-1][1]):
+                return hits
+            n *= 4
+
+    def stats(self) -> Dict[str, Any]:
+        """匹配统计：结果缓存命中情况，精确/拼音/编辑距离/前缀各路径的命中次数及精确命中率"""
+        total = self.counters["exact_hits"] + self.counters["exact_misses"]
+        stats = dict(self.counters)
+        stats["exact_hit_rate"] = self.counters["exact_hits"] / total if total else 0.0
+        stats.update(self.cache.stats())
+        return stats
+
+    @staticmethod
+    def _prepare(query: str) -> str:
+        if not query or len(query.strip()) < 2:
+            return ""
+        return normalize_query(query)
+
+    def match(self, query: str, threshold: float = 40, options: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        返回最佳匹配条目，即 match_candidates(query, 1, threshold, options) 的第一项。
+
+        参数:
+        query (str): OCR识别出的问题文本。
+        threshold (float): 最低相似度。
+        options (str): OCR识别出的选项区域文本，None 表示只按问题匹配。
+
+        返回:
+        Optional[Dict[str, Any]]: 匹配到的条目，无匹配时为None。
+        """
+        candidates = self.match_candidates(query, 1, threshold, options)
+        return candidates[0][0] if candidates else None
+
+    def match_candidates(self, query: str, k: int = 2, threshold: float = 40,
+                         options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        一次匹配返回前k个候选及其相似度，用 score_margin 判断第一名是否足够领先。
+
+        依次查精确哈希表、拼音首字母索引、编辑距离索引（启用时），命中时候选只来自该路径
+        （精确命中只有一个候选）；都未命中时再模糊匹配，第一名与 find_best_match_simple 一致
+        （设置了 scorer 时与传入同一 scorer 的 find_best_match_simple 一致）。
+        给出选项文本时，有选项的条目按问题+选项联合打分，措辞相近但选项不同的题目一次即可区分，
+        没有选项的条目仍只按问题打分（见 _match_options）。
+
+        参数:
+        query (str): OCR识别出的问题文本。
+        k (int): 最多返回的候选数。
+        threshold (float): 最低相似度。
+        options (str): OCR识别出的选项区域文本，None 表示只按问题匹配。
+
+        返回:
+        List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，第一项为最佳匹配，无匹配时为空列表。
+        """
+        query_clean = self._prepare(query)
+        if not query_clean:
+            return []
+        options_clean = option_key(options)
+        cache_key = (query_clean, threshold, k, options_clean)
+        candidates = self.cache.get(cache_key)
+        if candidates is MISSING:
+            if options_clean:
+                hits = self._match_options(query, query_clean, options_clean, threshold, k)
+            else:
+                hits = (self._fast_candidates(query, query_clean, threshold, k)
+                        or self._fuzzy_candidates(query_clean, threshold, k))
+            candidates = [(self.entries[i], score) for i, score in hits]
+            self.cache.put(cache_key, candidates)
+        return candidates
+
+    def _match_options(self, query: str, query_clean: str, options_clean: str,
+                       threshold: float, k: int) -> List[Tuple[int, float]]:
+        """
+        按问题+选项匹配，返回 (条目下标, 得分) 列表。
+
+        先走只看问题的快速路径，命中的候选（含选项不同的同名题目）按 option_score 重新打分；
+        都未命中或重新打分后都低于 threshold 时，分别在无选项条目的问题索引和有选项条目的联合索引上
+        取前k名合并，两个索引互不重叠，合并结果与按 option_score 线性扫描一致。
+        """
+        joint_query = joint_key(query_clean, options_clean)
+        hits = [(i, option_score(joint_query, self.keys[i], self.option_keys[i], score))
+                for i, score in self._fast_candidates(query, query_clean, threshold, self.OPTION_CANDIDATES)]
+        hits = [(i, score) for i, score in hits if score >= threshold]
+        if not hits:
+            hits = self.plain.top_k(query_clean, k, threshold) + self.joint.top_k(joint_query, k, threshold)
+        hits.sort(key=lambda h: (-h[1], h[0]))
+        return hits[:k]
+
+    def match_prefix(self, query: str, k: int = 2, threshold: float = 40,
+                     options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        按可见前缀匹配只显示了开头的题目，前缀唯一确定答案时才返回。
+
+        得分是可见部分与条目同样长度开头的相似度（见 core.matcher.prefix_score），不是已显示的比例，
+        与 match_candidates 的得分可以比较、可以算 score_margin；低于 threshold 或选项对不上的条目不返回。
+
+        参数:
+        query (str): OCR识别出的问题文本（可能只是开头一部分）。
+        k (int): 最多返回的候选数。
+        threshold (float): 最低相似度。
+        options (str): OCR识别出的选项区域文本，None 表示只按问题匹配。
+
+        返回:
+        List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，按相似度降序，答案不唯一或无匹配时为空列表。
+        """
+        query_clean = self._prepare(query)
+        if not query_clean:
+            return []
+        _, ids = unique_prefix(query, self.prefix.lookup, lambda i: self.entries[i]['ans'])
+        joint_query = joint_key(query_clean, option_key(options)) if options else ""
+        hits = [(i, self.prefix_similarity(query_clean, i, joint_query)) for i in ids]
+        hits = sorted((h for h in hits if h[1] >= threshold), key=lambda h: -h[1])
+        if not hits:
+            return []
+        self.counters["prefix_hits"] += 1
+        return [(self.entries[i], score) for i, score in hits[:k]]
+
+    def prefix_similarity(self, query_clean: str, i: int, joint_query: str = "") -> float:
+        """可见部分与第i个条目的相似度，见 core.matcher.prefix_score"""
+        return prefix_score(query_clean, self.keys[i], joint_query, self.option_keys[i] if joint_query else "")
+
+    def top_k(self, query: str, k: int = 5, threshold: float = 0) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        返回相似度最高的k个条目。
+
+        参数:
+        query (str): OCR识别出的问题文本。
+        k (int): 返回条目数。
+        threshold (float): 最低相似度。
+
+        返回:
+        List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，按相似度降序。
+        """
+        query_clean = self._prepare(query)
+        if not query_clean:
+            return []
+        return [(self.entries[i], score) for i, score in self.index.top_k(query_clean, k, threshold)]
+
+    def match_batch(self, queries: List[str], threshold: float = 40, workers: int = -1) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量匹配多条OCR文本（多区域/排队帧），整个打分矩阵在rapidfuzz的C层多线程计算。
+
+        参数:
+        queries (List[str]): OCR识别出的问题文本列表。
+        threshold (float): 最低相似度。
+        workers (int): 打分线程数，-1 表示使用全部CPU核。
+
+        返回:
+        List[Optional[Dict[str, Any]]]: 与输入一一对应的匹配条目，无匹配时为None。
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        cleaned = [self._prepare(q) for q in queries]
+        rows = []
+        for i, q in enumerate(cleaned):
+            if not q:
+                continue
+            cached = self.cache.get((q, threshold, 1, ""))
+            if cached is not MISSING:
+                results[i] = cached[0][0] if cached else None
+                continue
+            hits = self._fast_candidates(queries[i], q, threshold, 1)
+            if hits:
+                results[i] = self.entries[hits[0][0]]
+                self.cache.put((q, threshold, 1, ""), [(results[i], hits[0][1])])
+            else:
+                rows.append(i)
+        if not rows or not self.entries:
+            return results
+        # 自定义打分只对少数候选重新打分，逐条走单条匹配
+        if self.scorer is not None:
+            for i in rows:
+                results[i] = self.match(queries[i], threshold)
+            return results
+        scores = process.cdist([cleaned[i] for i in rows], self.choices, scorer=fuzz.QRatio,
+                               score_cutoff=threshold, dtype=np.float64, workers=workers)
+        # argmax 取每行第一个最大值，同分时与单条匹配一样取下标最小者
+        best = np.argmax(scores, axis=1)
+        for n, (row, col) in enumerate(zip(rows, best)):
+            score = scores[n, col]
+            candidates = []
+            if score >= threshold and score > 0:
+                results[row] = self.entries[col]
+                candidates = [(results[row], float(score))]
+            self.cache.put((cleaned[row], threshold, 1, ""), candidates)
+        return results
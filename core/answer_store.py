@@ -0,0 +1,196 @@
+"""
+列式答案存储。
+
+所有字符串（问题、自由文本答案、选项、拼音首字母）去重后拼接成一个UTF-8字符串池，
+用偏移数组定位；每个条目只占几个整数列，字母答案（A/B/...，即选项下标）存为小整数。
+按下标取条目时返回只读的 AnswerRecord 视图，用法与原来的 dict 相同。
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from collections.abc import Mapping, Sequence
+import numpy as np
+
+# 条目的标准字段，其余字段存入 extras
+FIELDS = ('q', 'ans', 'a', 'p')
+# 各整数列及其类型，-1 表示该字段不存在（q 为 -1 表示条目已删除）
+COLUMNS = {
+    'q_ids': np.int32,
+    'ans_ids': np.int32,
+    'ans_codes': np.int8,
+    'p_ids': np.int32,
+    'opt_starts': np.int32,
+    'opt_counts': np.int32,
+}
+
+
+def answer_code(ans: str) -> int:
+    """单个大写字母答案转为选项下标，其他答案返回-1"""
+    if len(ans) == 1 and 'A' <= ans <= 'Z':
+        return ord(ans) - ord('A')
+    return -1
+
+
+class AnswerRecord(Mapping):
+    """答案存储中单个条目的只读视图"""
+
+    __slots__ = ('_store', '_i')
+
+    def __init__(self, store: 'AnswerStore', i: int) -> None:
+        self._store = store
+        self._i = i
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store.field(self._i, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.field_names(self._i))
+
+    def __len__(self) -> int:
+        return len(self._store.field_names(self._i))
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class AnswerStore(Sequence):
+    """
+    列式答案存储，下标与答案库条目一一对应，已删除的条目返回None。
+
+    各数组可以直接是内存映射文件上的视图（见 core.bank_cache），加载时不复制。
+    """
+
+    def __init__(self, pool, str_offsets: np.ndarray, opt_ids: np.ndarray,
+                 columns: Dict[str, np.ndarray], extras: Optional[Dict[int, Dict[str, Any]]] = None) -> None:
+        """
+        参数:
+        pool (bytes | memoryview): UTF-8字符串池。
+        str_offsets (np.ndarray): 第i个字符串在池中的起止字节为 str_offsets[i]、str_offsets[i+1]。
+        opt_ids (np.ndarray): 各条目选项的字符串编号，条目的选项为 opt_ids[opt_start:opt_start+opt_count]。
+        columns (Dict[str, np.ndarray]): 每条目一行的整数列，见 COLUMNS。
+        extras (Dict[int, Dict[str, Any]]): 条目下标 -> 标准字段以外的字段。
+        """
+        self.pool = memoryview(pool)
+        self.str_offsets = str_offsets
+        self.opt_ids = opt_ids
+        self.columns = columns
+        self.extras = extras or {}
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Optional[Dict[str, Any]]],
+                     base: Optional['AnswerStore'] = None) -> 'AnswerStore':
+        """
+        由条目构建存储。
+
+        参数:
+        entries (Iterable[Optional[Dict[str, Any]]]): 答案条目，None 表示已删除的空位。
+        base (AnswerStore): 给出时把条目追加在其后，原有字符串编号保持不变。
+
+        返回:
+        AnswerStore: 新存储，base 不做修改。
+        """
+        first_id = len(base.str_offsets) - 1 if base is not None else 0
+        strings: Dict[str, int] = {}
+        encoded: List[bytes] = []
+
+        def intern(text: str) -> int:
+            sid = strings.get(text)
+            if sid is None:
+                sid = strings[text] = first_id + len(encoded)
+                encoded.append(text.encode('utf-8'))
+            return sid
+
+        rows = {name: [] for name in COLUMNS}
+        opt_ids: List[int] = []
+        opt_base = len(base.opt_ids) if base is not None else 0
+        extras: Dict[int, Dict[str, Any]] = {}
+        start = len(base) if base is not None else 0
+        for n, entry in enumerate(entries, start):
+            if entry is None:
+                for name in COLUMNS:
+                    rows[name].append(-1)
+                continue
+            options = entry.get('a')
+            code = answer_code(entry['ans'])
+            rows['q_ids'].append(intern(entry['q']))
+            rows['ans_codes'].append(code)
+            rows['ans_ids'].append(intern(entry['ans']) if code < 0 else -1)
+            rows['p_ids'].append(intern(entry['p']) if entry.get('p') is not None else -1)
+            rows['opt_starts'].append(opt_base + len(opt_ids))
+            rows['opt_counts'].append(len(options) if options is not None else -1)
+            opt_ids.extend(intern(o) for o in options or ())
+            extra = {k: v for k, v in entry.items() if k not in FIELDS}
+            if extra:
+                extras[n] = extra
+
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.uint32, count=len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum(lengths, out=offsets[1:])
+        columns = {name: np.array(values, dtype=dtype) for (name, dtype), values
+                   in zip(COLUMNS.items(), rows.values())}
+        if base is None:
+            return cls(b"".join(encoded), offsets, np.array(opt_ids, dtype=np.int32), columns, extras)
+        offsets += base.str_offsets[-1]
+        return cls(bytes(base.pool) + b"".join(encoded),
+                   np.concatenate([base.str_offsets, offsets[1:]]),
+                   np.concatenate([base.opt_ids, np.array(opt_ids, dtype=np.int32)]),
+                   {name: np.concatenate([base.columns[name], columns[name]]) for name in COLUMNS},
+                   {**base.extras, **extras})
+
+    def updated(self, removed: Iterable[int], added: Iterable[Dict[str, Any]]) -> 'AnswerStore':
+        """返回删除 removed 中的条目、并在末尾追加 added 后的新存储（写时复制，原存储不变）"""
+        # 追加时各列都是新拼接出的数组，可以直接原地标记删除
+        store = AnswerStore.from_entries(added, base=self)
+        for i in removed:
+            store.q_ids[i] = -1
+            store.extras.pop(i, None)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.q_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if self.q_ids[i] < 0:
+            return None
+        return AnswerRecord(self, i)
+
+    def string(self, sid: int) -> str:
+        """按编号从字符串池取出字符串"""
+        return str(self.pool[self.str_offsets[sid]:self.str_offsets[sid + 1]], 'utf-8')
+
+    def field(self, i: int, key: str) -> Any:
+        """读取第i个条目的字段，不存在时抛出 KeyError"""
+        if key == 'q':
+            return self.string(self.q_ids[i])
+        if key == 'ans':
+            code = self.ans_codes[i]
+            return chr(ord('A') + code) if code >= 0 else self.string(self.ans_ids[i])
+        if key == 'a' and self.opt_counts[i] >= 0:
+            start = self.opt_starts[i]
+            return [self.string(sid) for sid in self.opt_ids[start:start + self.opt_counts[i]].tolist()]
+        if key == 'p' and self.p_ids[i] >= 0:
+            return self.string(self.p_ids[i])
+        extra = self.extras.get(i)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def field_names(self, i: int) -> List[str]:
+        names = ['q', 'ans']
+        if self.opt_counts[i] >= 0:
+            names.append('a')
+        if self.p_ids[i] >= 0:
+            names.append('p')
+        names.extend(self.extras.get(i, ()))
+        return names
+
+    def nbytes(self) -> int:
+        """字符串池与各数组占用的字节数（不含 extras）"""
+        return (len(self.pool) + self.str_offsets.nbytes + self.opt_ids.nbytes
+                + sum(col.nbytes for col in self.columns.values()))
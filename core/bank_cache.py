@@ -0,0 +1,244 @@
+"""
+答案库二进制缓存。
+
+把解析、归一化、建索引的结果编译成一个可内存映射的文件，
+启动时只要缓存比所有源文件新就直接映射加载，耗时与题库大小基本无关。
+
+文件布局: MAGIC | 头长度(uint32) | 头(JSON) | 按8字节对齐的各数据段（偏移相对数据区起点）
+  str_pool      bytes        条目字符串池（UTF-8，见 core.answer_store）
+  str_offsets   uint32[s+1]  每个字符串在 str_pool 中的字节偏移
+  opt_ids       int32[*]     选项的字符串编号
+  q_ids 等      int32/int8[n] 条目整数列（见 answer_store.COLUMNS）
+  key_pool      bytes        归一化问题，以换行分隔（default_process 不会输出换行）
+  pinyin_pool   bytes        拼音首字母索引键，以换行分隔
+  lengths       int32[n]     归一化问题长度
+  post_chars    uint32[m]    倒排表字符码位
+  post_offsets  uint64[m+1]  每个字符在 post_ids/post_cnts 中的起止位置
+  post_ids      int32[*]     条目下标
+  post_cnts     int32[*]     字符在条目中的出现次数
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from core.answer_bank import AnswerBank
+from core.answer_store import COLUMNS, AnswerStore
+from core.bank_loader import BANK_EXTS, load_files, parse_file
+from core.ngram_index import NgramIndex
+from core.unmatched_journal import counts_path
+
+
+MAGIC = b"SCBANK03"
+CACHE_DIR = "cache"
+UNMATCHED_FILE = "unmatched_questions.txt"
+# 未匹配日志各读法的记录次数，文件名由 counts_path 从日志名推出，两处不会不一致
+UNMATCHED_COUNTS_FILE = counts_path(UNMATCHED_FILE)
+# data/ 下不是题库的配置文件
+SHARD_FILE = "bank_shards.json"
+PRESET_FILE = "position_presets.json"
+CONFUSION_FILE = "ocr_confusions.json"
+
+
+def parser_tag(parse: Callable) -> str:
+    return f"{parse.__module__}.{parse.__qualname__}"
+
+
+def cache_path_for(sources: List[str], tag: str = "", cache_dir: str = CACHE_DIR) -> str:
+    """按源文件列表和解析方式生成缓存文件名，不同入口加载不同文件集合时互不覆盖"""
+    digest = hashlib.md5("\n".join(sorted(sources) + [tag]).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(cache_dir, f"answers-{digest}.bin")
+
+
+def is_fresh(cache_path: str, sources: List[str]) -> bool:
+    """缓存存在、比所有源文件新且源文件集合未变化时返回True"""
+    try:
+        cache_mtime = os.path.getmtime(cache_path)
+        if any(os.path.getmtime(src) > cache_mtime for src in sources):
+            return False
+        return sorted(read_header(cache_path)["sources"]) == sorted(sources)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def _align(f) -> None:
+    pad = -f.tell() % 8
+    if pad:
+        f.write(b"\0" * pad)
+
+
+def compile_bank(bank: AnswerBank, cache_path: str, sources: Iterable[str] = ()) -> str:
+    """
+    将答案库编译为二进制缓存文件。
+
+    参数:
+    bank (AnswerBank): 已构建好的答案库。
+    cache_path (str): 输出文件路径。
+    sources (Iterable[str]): 题库源文件，用于判断缓存是否过期。
+
+    返回:
+    str: 输出文件路径。
+    """
+    store = bank.entries
+    chars = sorted(bank.index.postings)
+    post_chars = np.array([ord(ch) for ch in chars], dtype=np.uint32)
+    post_offsets = np.zeros(len(chars) + 1, dtype=np.uint64)
+    np.cumsum([len(bank.index.postings[ch][0]) for ch in chars], out=post_offsets[1:])
+    if chars:
+        post_ids = np.concatenate([bank.index.postings[ch][0] for ch in chars]).astype(np.int32)
+        post_cnts = np.concatenate([bank.index.postings[ch][1] for ch in chars]).astype(np.int32)
+    else:
+        post_ids = post_cnts = np.zeros(0, dtype=np.int32)
+
+    sections = [
+        ("str_pool", bytes(store.pool)),
+        ("str_offsets", store.str_offsets.astype(np.uint32).tobytes()),
+        ("opt_ids", store.opt_ids.astype(np.int32).tobytes()),
+        *((name, store.columns[name].astype(dtype).tobytes()) for name, dtype in COLUMNS.items()),
+        ("key_pool", "\n".join(bank.keys).encode('utf-8')),
+        ("pinyin_pool", "\n".join(bank.pinyin_keys).encode('utf-8')),
+        ("lengths", bank.index.lengths.astype(np.int32).tobytes()),
+        ("post_chars", post_chars.tobytes()),
+        ("post_offsets", post_offsets.tobytes()),
+        ("post_ids", post_ids.tobytes()),
+        ("post_cnts", post_cnts.tobytes()),
+    ]
+
+    # 只有新构建的答案库才会被编译，每个源文件的条目是连续区间
+    ranges = {path: [ids[0], ids[-1] + 1] for path, ids in bank.sources.items() if ids}
+    header = {"count": len(bank.entries), "sources": sorted(sources), "ranges": ranges,
+              "extras": {str(i): extra for i, extra in store.extras.items()}, "sections": {}}
+    offset = 0
+    for name, data in sections:
+        header["sections"][name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % 8)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        _align(f)
+        for name, data in sections:
+            f.write(data)
+            _align(f)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def read_header(cache_path: str) -> Dict[str, Any]:
+    """读取缓存文件头，data_start 为数据区起点"""
+    with open(cache_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是答案库缓存文件: {cache_path}")
+        (size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size).decode('utf-8'))
+    data_start = len(MAGIC) + 4 + size
+    header["data_start"] = data_start + (-data_start % 8)
+    return header
+
+
+def load_compiled(cache_path: str) -> AnswerBank:
+    """
+    内存映射加载二进制缓存，不再解析JSON、归一化或重建索引。
+
+    参数:
+    cache_path (str): 缓存文件路径。
+
+    返回:
+    AnswerBank: 答案库。
+    """
+    header = read_header(cache_path)
+    with open(cache_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mm)
+
+    def section(name, dtype=None):
+        start, size = header["sections"][name]
+        start += header["data_start"]
+        if dtype is None:
+            return buf[start:start + size]
+        return np.frombuffer(mm, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=start)
+
+    count = header["count"]
+    keys = bytes(section("key_pool")).decode('utf-8').split("\n") if count else []
+    pinyin_keys = bytes(section("pinyin_pool")).decode('utf-8').split("\n") if count else []
+    post_chars = section("post_chars", np.uint32)
+    post_offsets = section("post_offsets", np.uint64)
+    post_ids = section("post_ids", np.int32)
+    post_cnts = section("post_cnts", np.int32)
+    offsets = post_offsets.tolist()
+    postings = {}
+    for i, code in enumerate(post_chars.tolist()):
+        start, end = offsets[i], offsets[i + 1]
+        postings[chr(code)] = (post_ids[start:end], post_cnts[start:end])
+
+    index = NgramIndex.from_arrays(keys, section("lengths", np.int32), postings)
+    entries = AnswerStore(section("str_pool"), section("str_offsets", np.uint32), section("opt_ids", np.int32),
+                          {name: section(name, dtype) for name, dtype in COLUMNS.items()},
+                          {int(i): extra for i, extra in header.get("extras", {}).items()})
+    sources = {path: list(range(start, end)) for path, (start, end) in header.get("ranges", {}).items()}
+    bank = AnswerBank.from_compiled(entries, keys, index, sources, pinyin_keys)
+    # 映射对象需要与答案库同生命周期
+    bank._mmap = mm
+    return bank
+
+
+def load_or_compile(sources: List[str], parse: Callable[[str], List[Dict[str, Any]]] = None,
+                    cache_path: Optional[str] = None) -> AnswerBank:
+    """
+    缓存新于源文件时直接映射加载，否则解析源文件、构建答案库并写入缓存。
+
+    参数:
+    sources (List[str]): 题库源文件路径。
+    parse (Callable): 单个源文件的解析函数，返回条目列表；默认用 core.bank_loader 并行解析。
+    cache_path (str): 缓存文件路径，默认按源文件列表自动生成。
+
+    返回:
+    AnswerBank: 答案库。
+    """
+    cache_path = cache_path or cache_path_for(sources, parser_tag(parse or parse_file))
+    if is_fresh(cache_path, sources):
+        try:
+            return load_compiled(cache_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"答案库缓存损坏，重新编译: {e}")
+    files = {src: parse(src) for src in sources} if parse else load_files(sources)
+    bank = AnswerBank.from_sources(files)
+    try:
+        compile_bank(bank, cache_path, sources)
+    except OSError as e:
+        print(f"写入答案库缓存失败: {e}")
+    return bank
+
+
+def find_sources(data_dir: str = "data", exts=BANK_EXTS,
+                 exclude=(UNMATCHED_FILE, UNMATCHED_COUNTS_FILE, SHARD_FILE, PRESET_FILE, CONFUSION_FILE)) -> List[str]:
+    """遍历题库目录，返回符合扩展名的源文件（未匹配问题记录和配置文件不是题库）"""
+    sources = []
+    for root, dirs, files in os.walk(data_dir):
+        for file in files:
+            if file in exclude:
+                continue
+            if exts is None or file.endswith(tuple(exts)):
+                sources.append(os.path.join(root, file))
+    return sorted(sources)
+
+
+if __name__ == "__main__":
+    # 以 python -m core.bank_cache [data目录] 运行，强制重新编译GUI使用的题库缓存
+    import sys
+    import time
+    from core import bank_cache
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    sources = bank_cache.find_sources(data_dir)
+    path = bank_cache.cache_path_for(sources, bank_cache.parser_tag(bank_cache.parse_file))
+    if os.path.exists(path):
+        os.remove(path)
+    start_time = time.time()
+    bank = bank_cache.load_or_compile(sources)
+    print(f"已编译 {len(bank)} 条答案到 {path}，耗时: {time.time() - start_time:.3f}秒")
@@ -0,0 +1,190 @@
+"""
+题库加载器，GUI 和命令行两个入口共用。
+
+题库文件可以是JSON数组（允许BOM、尾随逗号）或每行一个JSON对象，
+解析时按块读取文件、逐个对象流式产出并校验字段，格式错误的条目跳过并报告，不影响同文件其他条目。
+多个大文件时在进程池中并行解析。
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import re
+import time
+
+# 题库文件扩展名
+BANK_EXTS = (".txt", ".json")
+# 源文件总大小超过该值才启用进程池，小题库启动子进程的开销比解析本身还大
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# 对象之间的空白、逗号和数组括号
+_SEPARATORS = re.compile(r'[\s,\[\]]*')
+_decoder = json.JSONDecoder()
+
+
+def validate_entry(entry: Any) -> Optional[str]:
+    """
+    校验题库条目：必须有非空字符串 'q' 和字符串 'ans'，可选 'a'（选项字符串列表）和 'p'（拼音首字母）。
+
+    返回:
+    Optional[str]: 错误说明，合法时为None。
+    """
+    if not isinstance(entry, dict):
+        return "条目不是JSON对象"
+    if not isinstance(entry.get('q'), str) or not entry['q'].strip():
+        return "缺少问题字段 'q'"
+    if not isinstance(entry.get('ans'), str):
+        return "缺少答案字段 'ans'"
+    options = entry.get('a')
+    if options is not None and not (isinstance(options, list) and all(isinstance(o, str) for o in options)):
+        return "选项字段 'a' 应为字符串列表"
+    if entry.get('p') is not None and not isinstance(entry['p'], str):
+        return "拼音字段 'p' 应为字符串"
+    return None
+
+
+class _Reader:
+    """
+    按块读取题库文件的缓冲区，供 raw_decode 从 pos 处解析。
+
+    缓冲区只保留未解析的部分和至少一块预读，内存与文件大小无关；
+    已解析的部分及时丢弃，JSONDecodeError 从缓冲区开头数行号的开销也不随文件增长。
+    行号随丢弃的部分累加，总共只数一遍换行。
+    """
+
+    # 每次读取的字符数
+    CHUNK_CHARS = 64 * 1024
+    # 已解析的部分超过这么多字符时从缓冲区丢弃
+    COMPACT_CHARS = 8 * 1024
+    # 单个条目最长这么多字符，超过仍解析失败时按格式错误跳过，不再继续预读
+    MAX_ENTRY_CHARS = 4 * 1024 * 1024
+    # 解析错误出现在缓冲区最后这么多个字符内时，可能只是条目还没读完
+    TAIL_CHARS = 8
+
+    def __init__(self, file) -> None:
+        self.file = file
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self._line = 1
+        self._line_pos = 0
+
+    def ahead(self) -> int:
+        return len(self.text) - self.pos
+
+    def compact(self) -> None:
+        """丢弃已解析的部分"""
+        self.line()
+        self.text = self.text[self.pos:]
+        self.pos = self._line_pos = 0
+
+    def fill(self) -> bool:
+        """再读一块，文件已读完时返回False"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.CHUNK_CHARS)
+        if not chunk:
+            self.eof = True
+            return False
+        self.compact()
+        self.text += chunk
+        return True
+
+    def line(self) -> int:
+        """pos 所在行号"""
+        self._line += self.text.count('\n', self._line_pos, self.pos)
+        self._line_pos = self.pos
+        return self._line
+
+    def skip_separators(self) -> bool:
+        """跳过对象之间的分隔符，并保证至少预读一块，没有剩余内容时返回False"""
+        while True:
+            self.pos = _SEPARATORS.match(self.text, self.pos).end()
+            if self.ahead() >= self.CHUNK_CHARS or not self.fill():
+                break
+        if self.pos > self.COMPACT_CHARS:
+            self.compact()
+        return self.pos < len(self.text)
+
+    def truncated(self, error: json.JSONDecodeError) -> bool:
+        """解析错误是否可能只是条目还没读完（出错位置在缓冲区末尾，或字符串没有结束），需要再读一块重试"""
+        if self.eof or self.ahead() >= self.MAX_ENTRY_CHARS:
+            return False
+        return error.pos >= len(self.text) - self.TAIL_CHARS or error.msg.startswith("Unterminated string")
+
+    def line_end(self) -> int:
+        """pos 所在行的行尾（不含换行符），必要时继续读取直到出现换行或文件结束"""
+        while True:
+            end = self.text.find('\n', self.pos)
+            if end >= 0:
+                return end
+            if not self.fill():
+                return len(self.text)
+
+
+def iter_entries(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐个产出题库文件中的合法条目，按块读取文件，内存占用与文件大小无关。
+
+    参数:
+    file_path (str): 题库文件路径。
+
+    返回:
+    Iterator[Dict[str, Any]]: 条目生成器。
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as file:
+        reader = _Reader(file)
+        while reader.skip_separators():
+            try:
+                entry, end = _decoder.raw_decode(reader.text, reader.pos)
+            except json.JSONDecodeError as e:
+                # 条目可能只读到一半，先读下一块再试
+                if reader.truncated(e) and reader.fill():
+                    continue
+                # 跳过出错的这一行，从下一行继续
+                line_end = reader.line_end()
+                print(f"解析JSON错误: {file_path} 第{reader.line()}行 {reader.text[reader.pos:line_end]} | {e.msg}")
+                reader.pos = line_end
+            else:
+                error = validate_entry(entry)
+                if error:
+                    print(f"题库条目格式错误: {file_path} 第{reader.line()}行 | {error}")
+                else:
+                    yield entry
+                reader.pos = end
+
+
+def parse_file(file_path: str) -> List[Dict[str, Any]]:
+    """解析单个题库文件，返回合法条目列表"""
+    return list(iter_entries(file_path))
+
+
+def _parse_timed(file_path: str) -> Tuple[str, List[Dict[str, Any]], float]:
+    start_time = time.time()
+    entries = parse_file(file_path)
+    return file_path, entries, time.time() - start_time
+
+
+def load_files(sources: List[str], workers: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    解析多个题库文件并打印每个文件的条目数和耗时。
+
+    参数:
+    sources (List[str]): 题库文件路径。
+    workers (int): 进程数，None 表示按CPU核数；1 表示在当前进程串行解析。
+
+    返回:
+    Dict[str, List[Dict[str, Any]]]: 源文件 -> 条目列表，顺序与 sources 一致。
+    """
+    total = sum(os.path.getsize(src) for src in sources if os.path.exists(src))
+    parallel = workers != 1 and len(sources) > 1 and total >= PARALLEL_MIN_BYTES
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_timed, sources))
+    else:
+        results = [_parse_timed(src) for src in sources]
+    files = {}
+    for path, entries, elapsed in results:
+        print(f"已解析 {path}: {len(entries)}条，耗时: {elapsed:.3f}秒")
+        files[path] = entries
+    return files
@@ -0,0 +1,226 @@
+"""
+按游戏分片的答案库。
+
+题库文件按 data/bank_shards.json 分组，每组是一个独立的 AnswerBank（各自的索引、缓存和编译缓存文件）。
+根据所选窗口标题路由到对应分片，只在该游戏的题目中匹配；分片内无匹配时再到全部分片中查找。
+配置示例:
+    {"三国": {"files": ["qqsanguo.txt"], "titles": ["QQ三国"], "options": false}}
+"options" 为 true 的游戏在命令行模式（main.py）下截取选项区域与问题联合匹配，默认只按问题匹配。
+未出现在配置中的题库文件各自成为一个以文件名命名的分片。
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+from core.answer_bank import AnswerBank
+from core.bank_cache import SHARD_FILE, find_sources, load_or_compile
+from core.matcher import joint_key, option_key
+from core.prefix_index import unique_prefix
+
+
+def load_shard_config(data_dir: str = "data") -> Dict[str, Dict[str, List[str]]]:
+    """读取分片配置，文件不存在或格式错误时返回空配置"""
+    path = os.path.join(data_dir, SHARD_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"读取分片配置失败: {path} | {e}")
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def group_sources(sources: List[str], config: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """
+    按配置把题库文件分组。
+
+    参数:
+    sources (List[str]): 题库文件路径。
+    config (Dict): 分片名 -> {"files": 文件名列表, "titles": 窗口标题关键字列表}。
+
+    返回:
+    Dict[str, List[str]]: 分片名 -> 题库文件路径。
+    """
+    owner = {name: shard for shard, spec in config.items() for name in spec.get("files", [])}
+    groups: Dict[str, List[str]] = {}
+    for src in sources:
+        name = os.path.basename(src)
+        shard = owner.get(name, os.path.splitext(name)[0])
+        groups.setdefault(shard, []).append(src)
+    return groups
+
+
+class ShardedBank:
+    """
+    按游戏分片的答案库，接口与 AnswerBank 相同，匹配方法多一个 shard 参数。
+
+    指定分片时只查该分片，单次匹配的开销只取决于该游戏的题量，不随游戏数量增长；
+    分片内无匹配或未指定分片时按相似度合并所有分片的候选。
+    """
+
+    def __init__(self, shards: Dict[str, AnswerBank], config: Optional[Dict[str, Dict[str, List[str]]]] = None) -> None:
+        """
+        参数:
+        shards (Dict[str, AnswerBank]): 分片名 -> 答案库。
+        config (Dict): 分片配置，见 load_shard_config。
+        """
+        self.shards = shards
+        self.config = config or {}
+        self.titles = {shard: spec.get("titles", []) for shard, spec in self.config.items()}
+        self.counters = {"shard_hits": 0, "fallback_hits": 0, "prefix_hits": 0}
+
+    @classmethod
+    def load(cls, data_dir: str = "data") -> 'ShardedBank':
+        """加载题库目录，每个分片单独走 load_or_compile（各自的编译缓存）"""
+        config = load_shard_config(data_dir)
+        groups = group_sources(find_sources(data_dir), config)
+        shards = {shard: load_or_compile(sources) for shard, sources in groups.items()}
+        return cls(shards, config)
+
+    def __len__(self) -> int:
+        return sum(len(bank) for bank in self.shards.values())
+
+    def __iter__(self) -> Iterator[Any]:
+        for bank in self.shards.values():
+            yield from bank
+
+    @property
+    def edit_distance(self) -> int:
+        return max((bank.edit_distance for bank in self.shards.values()), default=0)
+
+    @edit_distance.setter
+    def edit_distance(self, value: int) -> None:
+        for bank in self.shards.values():
+            bank.edit_distance = value
+
+    @property
+    def scorer(self) -> Optional[Callable[[str, str], float]]:
+        return next((bank.scorer for bank in self.shards.values()), None)
+
+    @scorer.setter
+    def scorer(self, value: Optional[Callable[[str, str], float]]) -> None:
+        for bank in self.shards.values():
+            bank.scorer = value
+
+    def prepare(self) -> None:
+        """预先构建各分片按需构建的索引，见 AnswerBank.prepare"""
+        for bank in self.shards.values():
+            bank.prepare()
+
+    def uses_options(self, shard: Optional[str]) -> bool:
+        """该分片的游戏是否截取选项区域与问题联合匹配（配置中 "options": true），未指定分片时为False"""
+        return bool(shard and self.config.get(shard, {}).get("options"))
+
+    def route(self, title: Optional[str]) -> Optional[str]:
+        """返回窗口标题对应的分片名，标题包含分片的某个关键字即命中，都不包含时返回None"""
+        if not title:
+            return None
+        title = title.lower()
+        for shard, keywords in self.titles.items():
+            if shard in self.shards and any(k.lower() in title for k in keywords if k):
+                return shard
+        return None
+
+    def _shard_of(self, path: str) -> str:
+        for shard, bank in self.shards.items():
+            if path in bank.sources:
+                return shard
+        return next(iter(group_sources([path], self.config)))
+
+    def updated(self, changes: Dict[str, Optional[List[Dict[str, Any]]]]) -> 'ShardedBank':
+        """按文件所属分片分别增量更新，写时复制地返回新对象，未变化的分片直接复用"""
+        grouped: Dict[str, Dict[str, Optional[List[Dict[str, Any]]]]] = {}
+        for path, items in changes.items():
+            grouped.setdefault(self._shard_of(path), {})[path] = items
+        shards = dict(self.shards)
+        for shard, sub in grouped.items():
+            if shard in shards:
+                shards[shard] = shards[shard].updated(sub)
+            else:
+                bank = AnswerBank.from_sources({path: items for path, items in sub.items() if items})
+                bank.edit_distance = self.edit_distance
+                bank.scorer = self.scorer
+                bank.prepare()
+                shards[shard] = bank
+        bank = ShardedBank({shard: b for shard, b in shards.items() if len(b)}, self.config)
+        bank.counters = dict(self.counters)
+        return bank
+
+    def match(self, query: str, threshold: float = 40, shard: Optional[str] = None,
+              options: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """返回最佳匹配条目，见 match_candidates"""
+        candidates = self.match_candidates(query, 1, threshold, shard, options)
+        return candidates[0][0] if candidates else None
+
+    def match_candidates(self, query: str, k: int = 2, threshold: float = 40,
+                         shard: Optional[str] = None,
+                         options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        返回前k个候选及其相似度。
+
+        参数:
+        query (str): OCR识别出的问题文本。
+        k (int): 最多返回的候选数。
+        threshold (float): 最低相似度。
+        shard (str): 优先查询的分片名（见 route），None 表示直接全局查找。
+        options (str): OCR识别出的选项区域文本，见 AnswerBank.match_candidates。
+
+        返回:
+        List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，按相似度降序。
+        """
+        routed = self.shards.get(shard) if shard else None
+        if routed is not None:
+            candidates = routed.match_candidates(query, k, threshold, options)
+            if candidates:
+                self.counters["shard_hits"] += 1
+                return candidates
+        merged = []
+        for bank in self.shards.values():
+            if bank is not routed:
+                merged.extend(bank.match_candidates(query, k, threshold, options))
+        if merged:
+            self.counters["fallback_hits"] += 1
+        # 稳定排序，同分时保留分片顺序
+        merged.sort(key=lambda c: -c[1])
+        return merged[:k]
+
+    def match_prefix(self, query: str, k: int = 2, threshold: float = 40, shard: Optional[str] = None,
+                     options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        按可见前缀匹配，见 AnswerBank.match_prefix。
+
+        指定分片时只查该分片：前缀匹配只是提前作答，分片内不唯一时交给后续帧的整题匹配（含全局回退），
+        不在其他分片里找一个恰好唯一的答案。未指定分片时各分片的结果答案也必须相同，否则视为不唯一。
+        """
+        routed = self.shards.get(shard) if shard else None
+        if routed is not None:
+            return routed.match_prefix(query, k, threshold, options)
+        query_clean = AnswerBank._prepare(query)
+        if not query_clean:
+            return []
+        # 各分片的命中合在一起判断唯一，某个分片内不唯一时整体也不唯一
+        banks = list(self.shards.values())
+        _, ids = unique_prefix(
+            query, lambda p: [(bank, i) for bank in banks for i in bank.prefix.lookup(p)],
+            lambda hit: hit[0].entries[hit[1]]['ans'])
+        joint_query = joint_key(query_clean, option_key(options)) if options else ""
+        hits = [(bank, i, bank.prefix_similarity(query_clean, i, joint_query)) for bank, i in ids]
+        hits = sorted((h for h in hits if h[2] >= threshold), key=lambda h: -h[2])
+        if not hits:
+            return []
+        self.counters["prefix_hits"] += 1
+        return [(bank.entries[i], score) for bank, i, score in hits[:k]]
+
+    def stats(self) -> Dict[str, Any]:
+        """各分片匹配统计之和，另含分片命中与全局回退命中次数"""
+        stats: Dict[str, Any] = dict(self.counters)
+        for bank in self.shards.values():
+            for key, value in bank.stats().items():
+                if not key.endswith("_rate"):
+                    stats[key] = stats.get(key, 0) + value
+        exact_total = stats.get("exact_hits", 0) + stats.get("exact_misses", 0)
+        cache_total = stats.get("cache_hits", 0) + stats.get("cache_misses", 0)
+        stats["exact_hit_rate"] = stats.get("exact_hits", 0) / exact_total if exact_total else 0.0
+        stats["cache_hit_rate"] = stats.get("cache_hits", 0) / cache_total if cache_total else 0.0
+        return stats
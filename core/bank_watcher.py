@@ -0,0 +1,67 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+from core.answer_bank import AnswerBank
+from core.bank_cache import find_sources
+from core.bank_loader import BANK_EXTS, parse_file
+
+
+class BankWatcher:
+    """
+    题库目录监视器。
+
+    轮询 data/ 下源文件的修改时间和大小，只重新解析发生变化的文件，
+    并以写时复制的方式生成新的答案库，匹配线程始终持有一个完整且不再变化的库。
+    """
+
+    def __init__(self, bank: AnswerBank, data_dir: str = "data", exts=BANK_EXTS,
+                 parse: Optional[Callable[[str], List[dict]]] = None) -> None:
+        """
+        参数:
+        bank (AnswerBank): 当前使用的答案库。
+        data_dir (str): 题库目录。
+        exts: 题库文件扩展名，None 表示全部文件。
+        parse (Callable): 单个源文件的解析函数。
+        """
+        self.bank = bank
+        self.data_dir = data_dir
+        self.exts = exts
+        self.parse = parse or parse_file
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        snapshot = {}
+        for path in find_sources(self.data_dir, exts=self.exts):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime, stat.st_size)
+        return snapshot
+
+    def poll(self) -> Optional[AnswerBank]:
+        """
+        检查一次题库目录。
+
+        返回:
+        Optional[AnswerBank]: 有文件变化时返回新答案库，否则返回None。
+        """
+        snapshot = self._scan()
+        changes = {path: None for path in self._snapshot if path not in snapshot}
+        for path, signature in list(snapshot.items()):
+            if self._snapshot.get(path) == signature:
+                continue
+            try:
+                changes[path] = self.parse(path)
+            except (OSError, UnicodeDecodeError) as e:
+                # 文件可能正在写入，保留旧状态，下次轮询重试
+                print(f"热加载解析失败: {path} | {e}")
+                if path in self._snapshot:
+                    snapshot[path] = self._snapshot[path]
+                else:
+                    snapshot.pop(path)
+        self._snapshot = snapshot
+        if not changes:
+            return None
+        self.bank = self.bank.updated(changes)
+        print(f"题库已热加载: {', '.join(sorted(changes))}，当前共{len(self.bank)}条")
+        return self.bank
@@ -0,0 +1,143 @@
+"""
+OCR混淆字感知的相似度。
+
+PaddleOCR 在游戏字体上的错误很固定（形近汉字、0/O、1/l 等），这类替换按普通编辑算分会掉到阈值以下，
+只能等下一次轮询读到干净的结果。这里把混淆字符对编译成一张码位查找表，每对折叠到同一个代表字，
+打分时两串先经 str.translate 折叠，再与原串的 QRatio 按替换代价加权，全程在C实现里完成。
+每个字只和一个字配对（按混淆表顺序，学习结果按次数降序，先到先得），不做传递闭包：
+“己/已”“已/巳”两对只收录前者，“己”和“巳”不会互相抵扣，学到的字符对再多也不会把无关的字连成一片。
+
+混淆表由 data/unmatched_questions.txt（含压缩归档）学习：未匹配记录中后来能在题库里高分匹配到的问题，
+与所匹配的原题逐字对齐，统计被替换的字符对。
+
+用法:
+    python -m core.confusion [--data data] [--unmatched data/unmatched_questions.txt] [--output data/ocr_confusions.json]
+"""
+from typing import Iterable, List, Tuple
+from collections import Counter
+import argparse
+import json
+import os
+from rapidfuzz import fuzz, utils
+from rapidfuzz.distance import Levenshtein
+
+CONFUSION_PATH = "data/ocr_confusions.json"
+
+# 未学习时使用的常见混淆（已按 normalize_query 小写化）
+DEFAULT_PAIRS = [
+    ("0", "o"), ("1", "l"), ("1", "i"), ("l", "i"),
+    ("己", "已"), ("已", "巳"), ("未", "末"), ("士", "土"), ("日", "曰"), ("人", "入"),
+    ("戊", "戌"), ("戌", "戍"),
+]
+
+
+class ConfusionScorer:
+    """
+    混淆字感知的打分函数，可作为 AnswerBank.scorer 或 find_best_match_simple 的 scorer。
+
+    得分 = 原串QRatio + (折叠后QRatio - 原串QRatio) * (1 - substitution_cost)，
+    即混淆字之间的替换只按普通替换的 substitution_cost 倍扣分；没有混淆字时与 QRatio 完全相同。
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = DEFAULT_PAIRS, substitution_cost: float = 0.3) -> None:
+        """
+        参数:
+        pairs (Iterable[Tuple[str, str]]): 互相混淆的字符对，不分方向；已经配过对的字再出现时该对忽略。
+        substitution_cost (float): 混淆字替换相对普通替换的代价，0 表示完全不扣分。
+        """
+        self.substitution_cost = substitution_cost
+        self.pairs: List[Tuple[str, str]] = []
+        paired = set()
+        for a, b in pairs:
+            if len(a) == 1 and len(b) == 1 and a != b and a not in paired and b not in paired:
+                self.pairs.append((a, b))
+                paired.update((a, b))
+        # 码位 -> 所在字符对的代表字（码位较小者），str.translate 直接查表
+        self.table = {ord(max(a, b)): min(a, b) for a, b in self.pairs}
+        self.chars = frozenset(paired)
+
+    def fold(self, text: str) -> str:
+        """把混淆字折叠为所在字符对的代表字"""
+        return text.translate(self.table)
+
+    def __call__(self, s1: str, s2: str, **kwargs) -> float:
+        score = fuzz.QRatio(s1, s2)
+        # 任一串不含混淆字时折叠不会改变得分
+        if score == 100 or self.chars.isdisjoint(s1) or self.chars.isdisjoint(s2):
+            return score
+        folded = fuzz.QRatio(s1.translate(self.table), s2.translate(self.table))
+        return score + (folded - score) * (1 - self.substitution_cost)
+
+    @classmethod
+    def load(cls, path: str = CONFUSION_PATH, substitution_cost: float = 0.3) -> 'ConfusionScorer':
+        """读取学习到的混淆表，文件不存在或格式错误时使用 DEFAULT_PAIRS"""
+        if not os.path.exists(path):
+            return cls(substitution_cost=substitution_cost)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            pairs = [(p["a"], p["b"]) for p in data["pairs"]]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"读取混淆表失败: {path} | {e}")
+            return cls(substitution_cost=substitution_cost)
+        return cls(pairs, substitution_cost)
+
+
+def learn_pairs(unmatched: Iterable[str], keys: List[str], min_score: float = 70,
+                max_edits: int = 3, min_count: int = 2) -> List[Tuple[str, str, int]]:
+    """
+    从未匹配记录学习混淆字符对。
+
+    参数:
+    unmatched (Iterable[str]): 未匹配问题（OCR原文）。
+    keys (List[str]): 题库问题，已经过 utils.default_process 归一化。
+    min_score (float): 未匹配问题与题库问题的QRatio不低于该值才视为同一道题。
+    max_edits (int): 对齐后替换超过该数量的行跳过，避免把不同的题对齐到一起。
+    min_count (int): 字符对至少出现这么多次才收录。
+
+    返回:
+    List[Tuple[str, str, int]]: (OCR结果字, 正确字, 次数)，按次数降序。
+    """
+    from core.matcher import normalize_query
+    from core.ngram_index import NgramIndex
+    index = NgramIndex(keys)
+    counts: Counter = Counter()
+    for line in dict.fromkeys(line.strip() for line in unmatched):
+        query = normalize_query(line) if line else ""
+        if len(query) < 2:
+            continue
+        hit = index.best(query, min_score)
+        if hit is None or hit[1] == 100:
+            continue
+        target = keys[hit[0]]
+        replaced = [(query[op.src_pos], target[op.dest_pos])
+                    for op in Levenshtein.editops(query, target) if op.tag == 'replace']
+        if 0 < len(replaced) <= max_edits:
+            counts.update(replaced)
+    return [(a, b, n) for (a, b), n in counts.most_common() if n >= min_count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--unmatched', default='data/unmatched_questions.txt')
+    parser.add_argument('--output', default=CONFUSION_PATH)
+    parser.add_argument('--min-count', type=int, default=2)
+    args = parser.parse_args()
+
+    from core.bank_cache import find_sources
+    from core.bank_loader import iter_entries
+    from core.unmatched_journal import read_journal
+    keys = [utils.default_process(e['q']) for src in find_sources(args.data) for e in iter_entries(src)]
+    pairs = learn_pairs(read_journal(args.unmatched), keys, min_count=args.min_count)
+    # 学习结果在前，未学到的默认混淆对保留在后
+    learned = {(a, b) for a, b, _ in pairs}
+    data = {"pairs": [{"a": a, "b": b, "count": n} for a, b, n in pairs]
+                     + [{"a": a, "b": b, "count": 0} for a, b in DEFAULT_PAIRS if (a, b) not in learned]}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"已学习 {len(pairs)} 个混淆字符对，写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+import numpy as np
+
+
+class FrameGate:
+    """
+    截图变化检测。
+
+    题目停留在屏幕上的几秒内截图完全不变，OCR结果也不会变。每帧缩成灰度缩略图（按块求均值），
+    与上一次送去识别的帧的缩略图比较，变化的块不足 min_blocks 个时跳过整个OCR。
+    与上一次识别的帧而不是上一帧比较，缓慢淡入的文字累积到足够变化时仍会触发识别。
+    """
+
+    def __init__(self, width: int = 128, diff_threshold: float = 4.0, min_blocks: int = 1) -> None:
+        """
+        参数:
+        width (int): 缩略图宽度（块数），高度按原图比例。
+        diff_threshold (float): 单个块灰度均值变化超过该值（0~255）才算变化。
+        min_blocks (int): 至少这么多个块变化才认为画面变了。
+        """
+        self.width = width
+        self.diff_threshold = diff_threshold
+        self.min_blocks = min_blocks
+        self._last: Optional[np.ndarray] = None
+        self.frames = 0
+        self.skipped = 0
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """按块求均值得到灰度缩略图（float32），块大小由 width 决定"""
+        h, w = frame.shape[:2]
+        block = max(1, w // self.width)
+        rows, cols = h // block, w // block
+        if rows == 0 or cols == 0:
+            return frame.astype(np.float32).reshape(h, w, -1).mean(axis=2)
+        crop = frame[:rows * block, :cols * block].astype(np.float32)
+        crop = crop.reshape(rows, block, cols, block, -1)
+        return crop.mean(axis=(1, 3, 4))
+
+    def changed(self, frame: Optional[np.ndarray]) -> bool:
+        """
+        判断画面是否相对上一次识别的帧发生变化，变化时把该帧记为新的基准。
+
+        参数:
+        frame (np.ndarray): 截图（H x W 或 H x W x C）。
+
+        返回:
+        bool: 需要识别时为True；截图为空时为False。
+        """
+        if frame is None or frame.size == 0:
+            return False
+        self.frames += 1
+        thumb = self.thumbnail(frame)
+        last = self._last
+        if last is not None and last.shape == thumb.shape:
+            if np.count_nonzero(np.abs(thumb - last) > self.diff_threshold) < self.min_blocks:
+                self.skipped += 1
+                return False
+        self._last = thumb
+        return True
+
+    def reset(self) -> None:
+        """丢弃基准帧（识别出错或截图区域变化后），下一帧一定会识别"""
+        self._last = None
+
+    def stats(self) -> Dict[str, float]:
+        """检测帧数、跳过帧数和跳过率"""
+        return {"frames": self.frames, "skipped": self.skipped,
+                "skip_ratio": self.skipped / self.frames if self.frames else 0.0}
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Hashable
+from collections import OrderedDict
+
+# 缓存未命中的标记（None 是合法的缓存结果，表示"未匹配"）
+MISSING = object()
+
+
+class MatchCache:
+    """
+    查询结果的LRU缓存。
+
+    同一道题会在屏幕上停留数秒，OCR噪声使每帧文本略有不同、又常在几种读法间来回，
+    缓存最近若干个不同查询的结果（包括未匹配），重复读法不会再进入匹配器。
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """
+        参数:
+        maxsize (int): 最多缓存的查询数，0 表示不缓存。
+        """
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """命中时返回缓存结果并移到最近使用位置，未命中返回 default（默认为 MISSING）"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        """调整容量，超出部分按最久未使用淘汰"""
+        self.maxsize = maxsize
+        while len(self._data) > max(maxsize, 0):
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "cache_size": len(self._data),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / total if total else 0.0,
+        }
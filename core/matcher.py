@@ -0,0 +1,155 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import heapq
+import unicodedata
+from rapidfuzz import fuzz, utils
+from core.ngram_index import NgramIndex
+
+WATERMARK = "咸鱼游戏"
+# 自定义打分函数没有折叠函数（fold）时，先按QRatio取这么多候选再重新打分
+RESCORE_CANDIDATES = 10
+
+
+def normalize_query(query: str) -> str:
+    """OCR文本归一化：小写、去标点、去水印"""
+    return utils.default_process(query).replace(WATERMARK, "").strip()
+
+
+def exact_key(text: str) -> str:
+    """精确匹配用的激进归一化：全角转半角、小写、只保留文字和数字、去水印"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ''.join(ch for ch in text if ch.isalnum()).replace(WATERMARK, "")
+
+
+def build_index(properties: List[Dict[str, Any]]) -> NgramIndex:
+    """由答案列表构建倒排索引（加载答案后执行一次）"""
+    return NgramIndex([utils.default_process(prop['q']) for prop in properties])
+
+
+def option_key(options) -> str:
+    """选项列表或OCR识别出的选项区域文本归一化为一个串，用于问题+选项联合匹配"""
+    if not options:
+        return ""
+    if not isinstance(options, str):
+        options = " ".join(options)
+    return normalize_query(options)
+
+
+def joint_key(key: str, options: str) -> str:
+    """问题+选项联合匹配键，没有选项时就是问题本身"""
+    return f"{key} {options}" if options else key
+
+
+def option_score(joint_query: str, key: str, entry_options: str, question_score: float) -> float:
+    """
+    按选项匹配时条目的得分。
+
+    有选项的条目按问题+选项联合键打分；没有选项的条目只看问题，
+    否则OCR识别出的选项文本会把完全匹配的问题从100分拉低到四十多分。
+
+    参数:
+    joint_query (str): joint_key(归一化问题, 归一化选项)。
+    key (str): 条目归一化后的问题。
+    entry_options (str): 条目归一化后的选项（option_key），没有选项时为空串。
+    question_score (float): 条目只按问题的得分。
+
+    返回:
+    float: 条目得分。
+    """
+    if not entry_options:
+        return question_score
+    return fuzz.QRatio(joint_query, joint_key(key, entry_options))
+
+
+def prefix_score(query_clean: str, key: str, joint_query: str = "", entry_options: str = "") -> float:
+    """
+    只显示了开头的题目与条目的相似度：可见部分与条目问题同样长度的开头比较，
+    给出联合查询键时有选项的条目按问题+选项打分（见 option_score）。
+
+    参数:
+    query_clean (str): 归一化后的可见部分。
+    key (str): 条目归一化后的问题。
+    joint_query (str): joint_key(归一化可见部分, 归一化选项)，不按选项匹配时为空串。
+    entry_options (str): 条目归一化后的选项，没有选项时为空串。
+
+    返回:
+    float: 条目得分。
+    """
+    key = key[:len(query_clean)]
+    score = fuzz.QRatio(query_clean, key)
+    return option_score(joint_query, key, entry_options, score) if joint_query else score
+
+
+def score_margin(candidates: Sequence[Tuple[Any, float]]) -> float:
+    """
+    第一名领先竞争者的相似度差。
+
+    答案与第一名相同的候选（重复收录的题目、同样选A的判断题）点下去结果一样，不算竞争者；
+    没有竞争者时为第一名的相似度，没有候选时为0。
+    """
+    if not candidates:
+        return 0.0
+    top, top_score = candidates[0]
+    runner_up = next((score for entry, score in candidates[1:] if entry.get('ans') != top.get('ans')), 0.0)
+    return top_score - runner_up
+
+
+# ========== 简化版匹配函数 ==========
+def find_best_match_simple(properties, query, threshold=40, index: Optional[NgramIndex] = None,
+                           scorer: Optional[Callable[[str, str], float]] = None):
+    if not query or len(query.strip()) < 2:
+        return None
+
+    query_clean = normalize_query(query)
+    if not query_clean:
+        return None
+
+    # 有索引时只对候选打分，结果与下面的线性扫描一致；索引按QRatio取候选，
+    # 自定义打分（如 core.confusion.ConfusionScorer）时QRatio排名靠后的条目可能胜出，只能线性扫描，
+    # 作为 AnswerBank.scorer 的参照结果
+    if index is not None and scorer is None:
+        hit = index.best(query_clean, threshold)
+        return properties[hit[0]] if hit else None
+
+    scorer = scorer or fuzz.QRatio
+    best_score = 0
+    best_prop = None
+
+    for prop in properties:
+        q_clean = utils.default_process(prop['q'])
+        score = scorer(query_clean, q_clean)
+
+        if score >= threshold and score > best_score:
+            best_score = score
+            best_prop = prop
+
+    return best_prop
+
+
+def find_top_matches_simple(properties, query, k=2, threshold=40, index: Optional[NgramIndex] = None):
+    """
+    一次扫描返回相似度最高的k个条目，第一项与 find_best_match_simple 一致。
+
+    参数:
+    properties (List[Dict[str, Any]]): 答案列表。
+    query (str): OCR识别出的问题文本。
+    k (int): 最多返回的候选数。
+    threshold (float): 最低相似度。
+    index (NgramIndex): 可选的倒排索引。
+
+    返回:
+    List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，按相似度降序、同分按下标升序。
+    """
+    if not query or len(query.strip()) < 2:
+        return []
+
+    query_clean = normalize_query(query)
+    if not query_clean:
+        return []
+
+    if index is not None:
+        return [(properties[i], score) for i, score in index.top_k(query_clean, k, threshold)]
+
+    scored = ((-fuzz.QRatio(query_clean, utils.default_process(prop['q'])), i)
+              for i, prop in enumerate(properties))
+    top = heapq.nsmallest(k, ((s, i) for s, i in scored if -s >= threshold and s < 0))
+    return [(properties[i], -s) for s, i in top]
@@ -0,0 +1,243 @@
+from typing import List, Optional, Tuple
+from collections import Counter, defaultdict
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+class NgramIndex:
+    """
+    答案库字符倒排索引。
+
+    fuzz.QRatio 的得分为 200*LCS/(len1+len2)，而最长公共子序列不会超过两串的公共字符数，
+    因此按倒排表累加出的公共字符数就是每个条目得分的严格上界。
+    查询时只累加罕见字的倒排表，常见字只计入上界，再按上界剪枝，结果与线性扫描完全一致。
+    """
+
+    # 先只累加少量罕见字，用上界最高的若干候选确定一个基准分，再批量剪枝；
+    # 基准分低于下一档时多累加几个字、重新选候选定基准，逐档降低
+    SEED_SIZE = 16
+    SEED_LEVELS = (90, 75, 60)
+
+    def __init__(self, keys: List[str]) -> None:
+        """
+        构建索引。
+
+        参数:
+        keys (List[str]): 已归一化的问题文本，下标与答案列表一一对应。
+        """
+        self.keys = np.array(keys, dtype=object)
+        self.lengths = np.array([len(k) for k in keys], dtype=np.int32)
+        postings = defaultdict(lambda: ([], []))
+        for i, key in enumerate(keys):
+            for ch, cnt in Counter(key).items():
+                ids, cnts = postings[ch]
+                ids.append(i)
+                cnts.append(cnt)
+        self.postings = {
+            ch: (np.array(ids, dtype=np.int32), np.array(cnts, dtype=np.int32))
+            for ch, (ids, cnts) in postings.items()
+        }
+
+    @classmethod
+    def from_arrays(cls, keys: List[str], lengths: np.ndarray, postings: dict) -> 'NgramIndex':
+        """由预编译的数组直接构造索引（见 core.bank_cache），跳过倒排表构建"""
+        index = cls.__new__(cls)
+        index.keys = keys if isinstance(keys, np.ndarray) else np.array(keys, dtype=object)
+        index.lengths = lengths
+        index.postings = postings
+        return index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def updated(self, removed: List[int], added: List[str]) -> 'NgramIndex':
+        """
+        写时复制地应用增量，返回新索引，原索引保持不变。
+
+        删除的条目保留空位（问题置空、长度为0，不会再被命中），新条目追加在末尾，
+        只有涉及到的字符才会重建倒排表，其余倒排表与原索引共享。
+
+        参数:
+        removed (List[int]): 要删除的条目下标。
+        added (List[str]): 追加的已归一化问题文本。
+
+        返回:
+        NgramIndex: 新索引。
+        """
+        keys = self.keys.copy()
+        lengths = self.lengths.copy()
+        affected = set()
+        for i in removed:
+            affected.update(keys[i])
+            keys[i] = ""
+            lengths[i] = 0
+        start = len(keys)
+        added_keys = np.empty(len(added), dtype=object)
+        added_keys[:] = added
+        keys = np.concatenate([keys, added_keys])
+        lengths = np.concatenate([lengths, np.array([len(k) for k in added], dtype=np.int32)])
+
+        new_postings = defaultdict(lambda: ([], []))
+        for i, key in enumerate(added, start):
+            for ch, cnt in Counter(key).items():
+                ids, cnts = new_postings[ch]
+                ids.append(i)
+                cnts.append(cnt)
+
+        postings = dict(self.postings)
+        removed_ids = np.array(sorted(removed), dtype=np.int32)
+        empty = np.zeros(0, dtype=np.int32)
+        for ch in affected | set(new_postings):
+            ids, cnts = postings.get(ch, (empty, empty))
+            if ch in affected:
+                keep = ~np.isin(ids, removed_ids)
+                ids, cnts = ids[keep], cnts[keep]
+            if ch in new_postings:
+                add_ids, add_cnts = new_postings[ch]
+                ids = np.concatenate([ids, np.array(add_ids, dtype=np.int32)])
+                cnts = np.concatenate([cnts, np.array(add_cnts, dtype=np.int32)])
+            if len(ids):
+                postings[ch] = (ids, cnts)
+            else:
+                postings.pop(ch, None)
+        return NgramIndex.from_arrays(keys, lengths, postings)
+
+    @staticmethod
+    def _skippable(rest: int, qlen: int, score: float) -> bool:
+        """只出现未累加字符的条目得分不超过 200*rest/(qlen+rest)，低于score时可忽略"""
+        return rest * (200.0 - score) < score * qlen - 1e-6
+
+    def best(self, query: str, threshold: float = 40) -> Optional[Tuple[int, float]]:
+        """
+        查找得分最高的条目（同分取下标最小者，与线性扫描一致）。
+
+        参数:
+        query (str): 已归一化的查询文本。
+        threshold (float): 最低得分。
+
+        返回:
+        Optional[Tuple[int, float]]: (条目下标, 得分)，无匹配时为None。
+        """
+        hits = self.top_k(query, 1, threshold)
+        return hits[0] if hits else None
+
+    def within(self, query: str, threshold: float, exclude: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        返回得分不低于 threshold 的全部条目，不限数量（聚类时取类中心的全部近邻）。
+
+        与 top_k 不同，不需要长度为题库规模的计数数组：只累加最罕见的几个字的倒排表，
+        其余字的总数小到 _skippable 时，不含任何已累加字符的条目得分必低于 threshold；
+        候选在累加到的倒排表上稀疏计数，开销只取决于这些倒排表的长度。
+
+        参数:
+        query (str): 已归一化的查询文本。
+        threshold (float): 最低得分，必须大于0。
+        exclude (np.ndarray): 可选的布尔数组，为True的条目不返回（已归类的读法）。
+
+        返回:
+        List[Tuple[int, float]]: (条目下标, 得分)列表，按下标升序。
+        """
+        if not query or len(self.keys) == 0:
+            return []
+        qlen = len(query)
+        terms = sorted(
+            ((self.postings[ch], cnt) for ch, cnt in Counter(query).items() if ch in self.postings),
+            key=lambda t: len(t[0][0]))
+        rest = sum(cnt for _, cnt in terms)
+        used = []
+        for term, cnt in terms:
+            if self._skippable(rest, qlen, threshold):
+                break
+            used.append((term, cnt))
+            rest -= cnt
+        if not used:
+            return []
+        if all(cnt == 1 for _, cnt in used):
+            # 查询里每个字只出现一次（最常见），公共字符数就是条目在倒排表里出现的次数
+            cand, common = np.unique(np.concatenate([ids for (ids, _), _ in used]), return_counts=True)
+        else:
+            cand, inverse = np.unique(np.concatenate([ids for (ids, _), _ in used]), return_inverse=True)
+            weights = np.concatenate([np.minimum(cnts, cnt) for (_, cnts), cnt in used])
+            common = np.bincount(inverse, weights=weights).astype(np.int32)
+        lens = self.lengths[cand]
+        keep = 200.0 * np.minimum(common + rest, lens) / (qlen + lens) >= threshold - 1e-9
+        if exclude is not None:
+            keep &= ~exclude[cand]
+        cand = cand[keep]
+        if len(cand) == 0:
+            return []
+        scores = process.cdist([query], self.keys[cand], scorer=fuzz.QRatio, dtype=np.float64, workers=1)[0]
+        return [(int(i), float(score)) for i, score in zip(cand, scores) if score >= threshold and score > 0]
+
+    def top_k(self, query: str, k: int = 5, threshold: float = 0) -> List[Tuple[int, float]]:
+        """
+        查找得分最高的k个条目，按得分降序、下标升序排列。
+
+        参数:
+        query (str): 已归一化的查询文本。
+        k (int): 返回条目数。
+        threshold (float): 最低得分。
+
+        返回:
+        List[Tuple[int, float]]: (条目下标, 得分)列表。
+        """
+        if not query or len(self.keys) == 0 or k <= 0:
+            return []
+        qlen = len(query)
+        # 按倒排表长度从短到长累加，库中不存在的字符对任何条目都没有贡献
+        terms = sorted(
+            ((self.postings[ch], cnt) for ch, cnt in Counter(query).items() if ch in self.postings),
+            key=lambda t: len(t[0][0]))
+        rest = sum(cnt for _, cnt in terms)
+        common = np.zeros(len(self.keys), dtype=np.int32)
+        touched = np.zeros(len(self.keys), dtype=bool)
+        pos = 0
+
+        def absorb(score):
+            nonlocal rest, pos
+            while pos < len(terms) and not self._skippable(rest, qlen, score):
+                (ids, cnts), cnt = terms[pos]
+                common[ids] += np.minimum(cnts, cnt)
+                touched[ids] = True
+                rest -= cnt
+                pos += 1
+
+        def candidates(score):
+            # 得分不低于score的条目至少有 score*qlen/(200-score) 个公共字符，先按公共字符数下限粗筛；
+            # 布尔数组取非零下标比计数数组快得多
+            need = int(np.ceil(score * qlen / (200.0 - score) - rest - 1e-6))
+            cand = np.flatnonzero(common >= need if need > 1 else touched)
+            lens = self.lengths[cand]
+            ub = 200.0 * np.minimum(common[cand] + rest, lens) / (qlen + lens)
+            keep = ub >= score - 1e-9
+            return cand[keep], ub[keep]
+
+        floor = threshold
+        seed_size = max(self.SEED_SIZE, k)
+        scored = {}
+        for level in self.SEED_LEVELS:
+            if level <= floor:
+                break
+            # 只累加到能排除得分低于level的条目为止；只有罕见字时上界区分不开候选，
+            # 选出的基准分可能很低，按它累加会把常见字的长倒排表全部加一遍
+            absorb(level)
+            cand, ub = candidates(threshold)
+            if len(cand) < k:
+                continue
+            n = min(seed_size, len(cand))
+            for i in cand[np.argpartition(-ub, n - 1)[:n]]:
+                if i not in scored:
+                    scored[i] = fuzz.QRatio(query, self.keys[i])
+            if len(scored) >= k:
+                floor = max(sorted(scored.values(), reverse=True)[k - 1], threshold)
+
+        # 上界低于第k名基准分的条目不可能进入结果
+        absorb(floor)
+        cand, _ = candidates(floor)
+        if len(cand) == 0:
+            return []
+        scores = process.cdist([query], self.keys[cand], scorer=fuzz.QRatio,
+                               dtype=np.float64, workers=1)[0]
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(int(cand[i]), float(scores[i])) for i in order
+                if scores[i] >= threshold and scores[i] > 0]
@@ -9,11 +9,53 @@ import numpy as np
 from paddleocr import PaddleOCR
 import paddle
 import gc
+from core.frame_gate import FrameGate
+from core.ocr_preprocess import Preprocessor
 
 class Ocr:
-    def __init__(self) -> None:
+    # 复用检测框时，最多连续复用这么多帧就重新完整检测一次
+    LAYOUT_MAX_REUSE = 30
+    # 复用检测框识别出的任一行置信度低于该值时，改为完整检测
+    LAYOUT_MIN_CONFIDENCE = 0.8
+
+    def __init__(self, reuse_layout: bool = False, preprocess="none") -> None:
+        """
+        参数:
+        reuse_layout (bool): 是否复用上一次的文本检测框，只对框内区域做识别（见 do_ocr_ext）。
+        preprocess (str | Preprocessor): 截图送入识别前的预处理，预设名见 core.ocr_preprocess.PRESETS。
+        """
         self.ocr = PaddleOCR(show_log=False)
         self.data = None  # 存储OCR识别结果
+        self.reuse_layout = reuse_layout
+        # 区域（单张识别为截图尺寸，批量识别为批中位置和尺寸） -> (检测框, 框外块掩码, 检测时的缩略图, 已复用次数)
+        self._layouts = {}
+        self._layout_gate = FrameGate()
+        self.layout_stats = {"detections": 0, "reused": 0}
+        self.set_preprocess(preprocess)
+
+    def set_preprocess(self, preprocess) -> None:
+        """
+        更换截图预处理（预设名或 Preprocessor），已缓存的检测框作废
+
+        参数:
+        preprocess (str | Preprocessor): 预处理预设名或自定义的 Preprocessor。
+        """
+        self.preprocess = preprocess if isinstance(preprocess, Preprocessor) else Preprocessor.preset(preprocess)
+        self._layouts.clear()
+
+    def warm_up(self) -> None:
+        """
+        用一张合成的文字图片完整跑一次检测和识别，
+        让第一次真正识别时不再承担模型初始化、显存分配等一次性开销。
+        """
+        img = np.full((160, 527, 3), 255, dtype=np.uint8)
+        cv2.putText(img, "0123456789 ABC", (20, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+        img, _ = self.preprocess(img)
+        self.ocr.ocr(img, cls=False)
+        self.ocr.ocr([img[40:110, 10:500]], det=False, cls=False)
+        # 预热图片的检测框和缩放比例不能留给真实截图
+        self._layouts.clear()
+        self.preprocess.reset()
 
     def multi_scale_template_match(self, main_image_path, template_image_path, method=cv2.TM_CCOEFF_NORMED, threshold=0.6, show=False):
         scales = [0.5, 0.75, 1.0, 1.25, 1.5]  # 定义要使用的尺度列表
@@ -107,12 +149,167 @@ class Ocr:
         return data
     
     def do_ocr_ext(self, img_data, simple=False) -> List:
-        data = self.ocr.ocr(img_data, cls=False)[0]
+        """
+        对截图数组进行OCR识别
+
+        开启 reuse_layout 时，同一尺寸的截图复用上一次检测到的文本框，只对框内区域做识别，
+        省掉每帧开销较大的检测网络；框外画面变化、识别置信度下降或连续复用 LAYOUT_MAX_REUSE 帧后重新完整检测。
+        截图先经过 preprocess 预处理，返回的文本框坐标已换算回原截图。
+
+        参数:
+        img_data (ndarray): 截图数组
+        simple (bool): 只返回文本列表
+
+        返回:
+        List: OCR识别结果，格式与 PaddleOCR 相同（[[文本框, (文本, 置信度)], ...]）
+        """
+        img, scale = self.preprocess(img_data)
+        if self.reuse_layout:
+            data = self._ocr_reuse_layout(img)
+        else:
+            data = self.ocr.ocr(img, cls=False)[0]
+        data = self._restore_boxes(data, scale)
         if simple: return self.get_all_text(data)
         # self.data = data
         # gc.collect()
         return data
     
+    def do_ocr_batch(self, images: List[np.ndarray], simple=False) -> List[List]:
+        """
+        对多个区域（问题区、选项区、多个游戏窗口）一次识别
+
+        检测仍逐张进行（开启 reuse_layout 时复用检测框可跳过），所有区域的文本行裁剪后
+        合并成一次识别调用，由识别模型按批推理，分摊每次调用的前后处理开销。
+
+        参数:
+        images (List[ndarray]): 各区域的截图数组
+        simple (bool): 只返回文本列表
+
+        返回:
+        List[List]: 与 images 一一对应，每项格式与 do_ocr_ext 相同（未识别到文字时为None，simple 时为空列表）
+        """
+        images, scales = zip(*(self.preprocess(img) for img in images)) if images else ((), ())
+        # 检测框按区域在批中的位置分别缓存，多个同尺寸的游戏窗口互不覆盖
+        keys = [(i, img.shape) for i, img in enumerate(images)]
+        plans = []
+        for key, img in zip(keys, images):
+            boxes = self._cached_boxes(key, img) if self.reuse_layout else None
+            plans.append((boxes, True) if boxes is not None else (self._detect(key, img), False))
+        crops = [self._crop_box(img, box) for img, (boxes, _) in zip(images, plans) for box in boxes or []]
+        rec_res = self.ocr.ocr(crops, det=False, cls=False)[0] if crops else []
+        drop_score = getattr(self.ocr, "drop_score", 0.5)
+        results, pos = [], 0
+        for key, img, scale, (boxes, cached) in zip(keys, images, scales, plans):
+            boxes = boxes or []
+            res = rec_res[pos:pos + len(boxes)]
+            pos += len(boxes)
+            if cached and not self._confident(res, boxes):
+                data = self._ocr_full(key, img)
+            else:
+                if cached:
+                    self._mark_reused(key)
+                data = [[box, (text, score)] for box, (text, score) in zip(boxes, res)
+                        if score >= drop_score] or None
+            data = self._restore_boxes(data, scale)
+            results.append(self.get_all_text(data) if simple else data)
+        return results
+
+    def _ocr_reuse_layout(self, img: np.ndarray) -> List:
+        # 单张识别按截图尺寸缓存检测框（问题区和选项区尺寸不同）
+        key = img.shape
+        boxes = self._cached_boxes(key, img)
+        if boxes is not None:
+            rec_res = self.ocr.ocr([self._crop_box(img, box) for box in boxes], det=False, cls=False)[0]
+            if self._confident(rec_res, boxes):
+                self._mark_reused(key)
+                return [[box, (text, score)] for box, (text, score) in zip(boxes, rec_res)]
+        return self._ocr_full(key, img)
+
+    def _cached_boxes(self, key, img: np.ndarray):
+        """该区域上一次的检测框仍然可用时返回检测框，否则返回None"""
+        layout = self._layouts.get(key)
+        if layout is None:
+            return None
+        boxes, outside, ref, reused = layout
+        if reused >= self.LAYOUT_MAX_REUSE:
+            return None
+        # 框外的块有变化说明版面变了（多了一行、题目变长超出原框等）
+        thumb = self._layout_gate.thumbnail(img)
+        if (np.abs(thumb - ref)[outside] > self._layout_gate.diff_threshold).any():
+            return None
+        if not all(self._crop_box(img, box).size for box in boxes):
+            return None
+        return boxes
+
+    def _confident(self, rec_res, boxes) -> bool:
+        """复用检测框识别出的每一行都非空且置信度足够"""
+        return len(rec_res) == len(boxes) and all(
+            text and score >= self.LAYOUT_MIN_CONFIDENCE for text, score in rec_res)
+
+    def _mark_reused(self, key) -> None:
+        boxes, outside, ref, reused = self._layouts[key]
+        self._layouts[key] = (boxes, outside, ref, reused + 1)
+        self.layout_stats["reused"] += 1
+
+    def _remember_layout(self, key, img: np.ndarray, boxes) -> None:
+        if not self.reuse_layout:
+            return
+        if boxes:
+            thumb = self._layout_gate.thumbnail(img)
+            self._layouts[key] = (boxes, self._outside_mask(img, thumb.shape, boxes), thumb, 0)
+        else:
+            self._layouts.pop(key, None)
+
+    def _ocr_full(self, key, img: np.ndarray) -> List:
+        """完整检测+识别，并记下检测框"""
+        data = self.ocr.ocr(img, cls=False)[0]
+        self.layout_stats["detections"] += 1
+        self._remember_layout(key, img, [item[0] for item in data] if data else None)
+        return data
+
+    def _detect(self, key, img: np.ndarray) -> List:
+        """只做检测，返回按阅读顺序（从上到下、同一行从左到右）排列的文本框，并记下检测框"""
+        boxes = self.ocr.ocr(img, rec=False, cls=False)[0] or []
+        # 与 PaddleOCR 一致：纵坐标相差不到10像素的框视为同一行
+        boxes.sort(key=lambda b: (b[0][1], b[0][0]))
+        for i in range(len(boxes) - 1):
+            for j in range(i, -1, -1):
+                if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                    boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+                else:
+                    break
+        self.layout_stats["detections"] += 1
+        self._remember_layout(key, img, boxes)
+        return boxes
+
+    @staticmethod
+    def _restore_boxes(data, scale: float):
+        """把缩小后截图上的文本框坐标换算回原截图"""
+        if not data or scale == 1.0:
+            return data
+        return [[[[x / scale, y / scale] for x, y in box], res] for box, res in data]
+
+    @staticmethod
+    def _crop_box(img: np.ndarray, box) -> np.ndarray:
+        """按文本框的外接矩形裁剪（题目文字都是水平的，不需要透视变换）"""
+        xs = [p[0] for p in box]
+        ys = [p[1] for p in box]
+        h, w = img.shape[:2]
+        x1, x2 = max(0, int(min(xs))), min(w, int(np.ceil(max(xs))))
+        y1, y2 = max(0, int(min(ys))), min(h, int(np.ceil(max(ys))))
+        return img[y1:y2, x1:x2]
+
+    def _outside_mask(self, img: np.ndarray, thumb_shape, boxes) -> np.ndarray:
+        """缩略图中不与任何文本框（外扩一个块）重叠的块"""
+        block = max(1, img.shape[1] // self._layout_gate.width)
+        mask = np.ones(thumb_shape, dtype=bool)
+        for box in boxes:
+            xs = [p[0] for p in box]
+            ys = [p[1] for p in box]
+            mask[max(0, int(min(ys)) // block - 1):int(max(ys)) // block + 2,
+                 max(0, int(min(xs)) // block - 1):int(max(xs)) // block + 2] = False
+        return mask
+
     def search_text(self, query: str, data: List[List[Any]] = None, threshold: float = 0.6) -> List[Tuple[str, Any]]:
         """
         在OCR识别结果中搜索与query最相似的文本项，并按照相似度排序。
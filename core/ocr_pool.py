@@ -0,0 +1,132 @@
+"""
+进程内共享的OCR引擎池。
+
+PaddleOCR 加载模型要好几秒，第一次推理也比稳定后慢得多。引擎在程序启动时由后台线程创建并预热，
+OCR线程每次启动时借出、停止时归还，反复启停不再重新加载模型。
+一个引擎同一时间只借给一个线程（Paddle 预测器不能被多个线程同时调用），归还后才能被其他线程使用。
+"""
+from typing import Any, Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+import queue
+import threading
+import time
+
+# 默认引擎的截图预处理预设（core.ocr_preprocess.PRESETS），用 bench/ocr_preprocess_bench.py 在录制的截图上选定
+OCR_PREPROCESS = "none"
+
+
+def _default_factory() -> Any:
+    # 延迟导入，只用到引擎池接口的地方不必加载 paddle
+    from core.ocr import Ocr
+    return Ocr(reuse_layout=True, preprocess=OCR_PREPROCESS)
+
+
+class OcrPool:
+    """
+    OCR引擎池，最多创建 size 个引擎。
+
+    池未满时 acquire 在调用线程中直接创建；池已满时等待其他线程归还（或后台预热完成）。
+    """
+
+    def __init__(self, factory: Optional[Callable[[], Any]] = None, size: int = 1) -> None:
+        """
+        参数:
+        factory (Callable): 创建引擎的函数，默认为开启 reuse_layout 的 core.ocr.Ocr。
+        size (int): 最多创建的引擎数。
+        """
+        self.factory = factory or _default_factory
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.counters = {"created": 0, "acquired": 0, "wait_seconds": 0.0}
+
+    def _create(self) -> Optional[Any]:
+        """池未满时创建并预热一个引擎，已满时返回None"""
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            start_time = time.time()
+            engine = self.factory()
+            if hasattr(engine, "warm_up"):
+                engine.warm_up()
+            print(f"OCR引擎已加载并预热，耗时: {time.time() - start_time:.3f}秒")
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        self.counters["created"] += 1
+        return engine
+
+    def warm_up(self, count: Optional[int] = None, background: bool = True) -> None:
+        """
+        预先创建并预热引擎（程序启动时调用）。
+
+        参数:
+        count (int): 预热的引擎数，默认为 size。
+        background (bool): 在后台线程中执行，不阻塞界面启动。
+        """
+        def run():
+            for _ in range(count or self.size):
+                try:
+                    engine = self._create()
+                except Exception as e:
+                    print(f"OCR引擎预热失败: {e}")
+                    return
+                if engine is None:
+                    return
+                self._idle.put(engine)
+
+        if background:
+            threading.Thread(target=run, name="OcrWarmUp", daemon=True).start()
+        else:
+            run()
+
+    def acquire(self) -> Any:
+        """借出一个引擎，归还前只由当前线程使用"""
+        start_time = time.time()
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                engine = self._create()
+                if engine is None:
+                    # 引擎都已借出或正在后台预热，等待归还；预热失败时下一轮会在本线程重新创建
+                    try:
+                        engine = self._idle.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+            self.counters["acquired"] += 1
+            self.counters["wait_seconds"] += time.time() - start_time
+            return engine
+
+    def release(self, engine: Any) -> None:
+        """归还引擎"""
+        if engine is not None:
+            self._idle.put(engine)
+
+    @contextmanager
+    def engine(self) -> Iterator[Any]:
+        engine = self.acquire()
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, idle=self._idle.qsize())
+
+
+_pool: Optional[OcrPool] = None
+_pool_lock = threading.Lock()
+
+
+def ocr_pool() -> OcrPool:
+    """进程内唯一的OCR引擎池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OcrPool()
+        return _pool
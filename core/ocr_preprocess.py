@@ -0,0 +1,145 @@
+"""
+OCR前的截图预处理。
+
+截图以原分辨率的RGB数组送进 PaddleOCR，而题目文字大且对比度高，检测网络的耗时随像素数增长，
+把截图缩小到文字高度刚好够识别、去掉颜色或二值化后，识别结果基本不变而耗时明显下降。
+预处理由若干步骤组成，常用组合定义为命名预设（PRESETS），可用 bench/ocr_preprocess_bench.py
+在录制的截图上比较各预设的耗时和匹配准确率，选出不影响准确率的最快预设。
+"""
+from typing import Dict, Optional, Sequence, Tuple
+import time
+import cv2
+import numpy as np
+
+# 可用的预处理步骤，按给定顺序执行
+STEPS = ("gray", "downscale", "binarize")
+
+PRESETS: Dict[str, Tuple[str, ...]] = {
+    "none": (),
+    "gray": ("gray",),
+    "downscale": ("downscale",),
+    "gray_downscale": ("gray", "downscale"),
+    "binary": ("gray", "downscale", "binarize"),
+}
+
+
+def to_gray(img: np.ndarray) -> np.ndarray:
+    """RGB/RGBA截图转灰度，已是灰度时原样返回"""
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Otsu二值化，统一成白底黑字（深色背景的截图取反）"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) < binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def estimate_text_height(gray: np.ndarray, min_height: int = 4) -> Optional[float]:
+    """
+    按水平投影估计文字行高。
+
+    二值化后取占少数的一类像素为文字，含文字的连续行为一个文本行，返回各文本行高度的中位数。
+
+    参数:
+    gray (np.ndarray): 灰度截图。
+    min_height (int): 低于该高度的行（下划线、噪点）不计。
+
+    返回:
+    Optional[float]: 文字行高（像素），截图中没有文字时为None。
+    """
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(ink) > ink.size / 2:
+        ink = 1 - ink
+    rows = ink.sum(axis=1) > max(2, ink.shape[1] * 0.005)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+    runs = edges[1::2] - edges[::2]
+    runs = runs[runs >= min_height]
+    return float(np.median(runs)) if len(runs) else None
+
+
+class Preprocessor:
+    """
+    截图预处理流水线。
+
+    调用时返回处理后的图片和缩放比例，识别结果中的文本框坐标除以该比例即为原截图坐标。
+    缩放比例按截图尺寸估计一次后固定（同一区域的文字大小不变），
+    输出尺寸稳定，Ocr 的检测框复用不会因比例抖动而失效。
+    """
+
+    def __init__(self, steps: Sequence[str] = (), text_height: int = 32, min_scale: float = 0.25) -> None:
+        """
+        参数:
+        steps (Sequence[str]): 预处理步骤，取值见 STEPS。
+        text_height (int): downscale 把文字行高缩小到该值（像素），不放大。
+        min_scale (float): 最小缩放比例。
+        """
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f"未知的预处理步骤: {unknown}，可选: {STEPS}")
+        self.steps = tuple(steps)
+        self.text_height = text_height
+        self.min_scale = min_scale
+        # 截图尺寸 -> 缩放比例
+        self._scales: Dict[tuple, float] = {}
+        self.frames = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def preset(cls, name: str, **kwargs) -> "Preprocessor":
+        """按预设名创建，kwargs 传给构造函数"""
+        if name not in PRESETS:
+            raise ValueError(f"未知的预处理预设: {name}，可选: {list(PRESETS)}")
+        return cls(PRESETS[name], **kwargs)
+
+    def __call__(self, img: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        参数:
+        img (np.ndarray): RGB截图。
+
+        返回:
+        Tuple[np.ndarray, float]: 处理后的三通道图片（PaddleOCR 的模型输入为三通道）和缩放比例。
+        """
+        if not self.steps:
+            return img, 1.0
+        start_time = time.perf_counter()
+        scale = 1.0
+        for step in self.steps:
+            if step == "gray":
+                img = to_gray(img)
+            elif step == "downscale":
+                scale = self.scale_for(img)
+                if scale < 1.0:
+                    img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            elif step == "binarize":
+                img = binarize(to_gray(img))
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+        self.frames += 1
+        self.seconds += time.perf_counter() - start_time
+        return img, scale
+
+    def scale_for(self, img: np.ndarray) -> float:
+        """该尺寸截图的缩放比例，按1/8取整；还没有估计出文字高度（如空白截图）时为1"""
+        scale = self._scales.get(img.shape)
+        if scale is None:
+            height = estimate_text_height(to_gray(img))
+            if height is None:
+                return 1.0
+            scale = float(min(1.0, max(self.min_scale, np.floor(self.text_height / height * 8) / 8)))
+            self._scales[img.shape] = scale
+        return scale
+
+    def reset(self) -> None:
+        """丢弃已估计的缩放比例和耗时统计（截图区域或游戏画面大小变化后）"""
+        self._scales.clear()
+        self.frames = 0
+        self.seconds = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """处理帧数和平均耗时（毫秒）"""
+        return {"frames": self.frames,
+                "mean_ms": self.seconds * 1000 / self.frames if self.frames else 0.0}
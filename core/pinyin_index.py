@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional
+from bisect import bisect_left
+import re
+import unicodedata
+
+try:
+    from pypinyin import lazy_pinyin, Style
+    from pypinyin.pinyin_dict import pinyin_dict
+except ImportError:  # 拼音转换为可选功能，未安装 pypinyin 时跳过
+    lazy_pinyin = None
+
+PINYIN_AVAILABLE = lazy_pinyin is not None
+
+_NON_KEY = re.compile(r'[^a-z0-9]')
+_initials_table: Optional[Dict[int, str]] = None
+
+
+def to_initials(text: str) -> str:
+    """汉字转拼音首字母，其余字符原样保留（与题库 'p' 字段格式一致），按词组判断多音字，用于编译题库"""
+    if not PINYIN_AVAILABLE:
+        return ""
+    return ''.join(lazy_pinyin(text, style=Style.FIRST_LETTER))
+
+
+def to_initials_fast(text: str) -> str:
+    """
+    逐字查表转拼音首字母，用于每帧的OCR文本。
+
+    lazy_pinyin 的分词每条要几百微秒，比模糊匹配本身还贵；查表只需几微秒，
+    代价是多音字固定取最常用读音，读音不一致时会回落到模糊匹配。
+    """
+    global _initials_table
+    if not PINYIN_AVAILABLE:
+        return ""
+    if _initials_table is None:
+        table = {}
+        for code, readings in pinyin_dict.items():
+            # 去掉声调符号后取首字母
+            first = unicodedata.normalize('NFKD', readings.split(',')[0])[:1]
+            if first:
+                table[code] = first
+        _initials_table = table
+    return text.translate(_initials_table)
+
+
+def pinyin_key(initials: str) -> str:
+    """拼音首字母索引键：小写，只保留字母和数字"""
+    return _NON_KEY.sub('', initials.lower())
+
+
+def fill_pinyin(entries: List[dict]) -> int:
+    """
+    为缺少 'p' 字段的条目生成拼音首字母（编译题库时执行一次）。
+
+    返回:
+    int: 补全的条目数。
+    """
+    if not PINYIN_AVAILABLE:
+        return 0
+    filled = 0
+    for entry in entries:
+        if not entry.get('p') and entry.get('q'):
+            entry['p'] = to_initials(entry['q'])
+            filled += 1
+    return filled
+
+
+class PinyinIndex:
+    """
+    拼音首字母索引。
+
+    OCR把字认成同音字时首字母不变，先按首字母做哈希查找或前缀查找，
+    命中唯一条目就不必进行模糊匹配。
+    """
+
+    # 首字母太短时重复率很高，不走拼音索引
+    MIN_LENGTH = 6
+
+    def __init__(self, keys: List[str]) -> None:
+        """
+        参数:
+        keys (List[str]): 每个条目的拼音首字母索引键（见 pinyin_key），下标与答案列表一一对应。
+        """
+        self.table: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            if key:
+                self.table.setdefault(key, []).append(i)
+        self.sorted_keys = sorted(self.table)
+
+    def lookup(self, key: str) -> List[int]:
+        """首字母完全相同的条目下标"""
+        if len(key) < self.MIN_LENGTH:
+            return []
+        return self.table.get(key, [])
+
+    def prefix(self, key: str, limit: int = 2) -> List[int]:
+        """
+        首字母以 key 开头的条目下标，最多返回 limit 个。
+
+        参数:
+        key (str): 拼音首字母前缀。
+        limit (int): 最多返回条目数，用于判断前缀是否唯一。
+
+        返回:
+        List[int]: 条目下标。
+        """
+        if len(key) < self.MIN_LENGTH:
+            return []
+        ids = []
+        pos = bisect_left(self.sorted_keys, key)
+        while pos < len(self.sorted_keys) and self.sorted_keys[pos].startswith(key):
+            ids.extend(self.table[self.sorted_keys[pos]])
+            if len(ids) >= limit:
+                return ids[:limit]
+            pos += 1
+        return ids
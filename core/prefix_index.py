@@ -0,0 +1,85 @@
+from typing import Callable, List, Sequence, Tuple
+from bisect import bisect_left
+from core.matcher import exact_key
+
+
+class PrefixIndex:
+    """
+    问题前缀索引（排序后的精确匹配键）。
+
+    咸鱼大冲关等模式的题目逐字滚动/淡入，前几帧只能读到题目开头，整题模糊匹配达不到阈值。
+    可见部分在排序键数组中二分定位，以它开头的条目答案唯一时即可提前作答。
+    """
+
+    # 前缀太短时几乎不可能唯一，不查
+    MIN_LENGTH = 4
+    # 以前缀开头的条目超过该数时视为不唯一，不再逐条比较答案
+    MAX_SCAN = 32
+
+    def __init__(self, keys: Sequence[str]) -> None:
+        """
+        参数:
+        keys (Sequence[str]): 已归一化的问题文本，下标与答案列表一一对应，空串表示已删除的条目。
+        """
+        pairs = sorted((exact_key(key), i) for i, key in enumerate(keys) if key)
+        pairs = [(key, i) for key, i in pairs if key]
+        self.sorted_keys = [key for key, _ in pairs]
+        self.ids = [i for _, i in pairs]
+
+    def __len__(self) -> int:
+        return len(self.sorted_keys)
+
+    def lookup(self, prefix: str, limit: int = MAX_SCAN) -> List[int]:
+        """
+        精确键以 prefix 开头的条目下标，按键排序，最多返回 limit + 1 个（多出的一个表示超过上限）。
+
+        参数:
+        prefix (str): 已用 exact_key 归一化的可见前缀。
+        limit (int): 最多需要的条目数。
+
+        返回:
+        List[int]: 条目下标。
+        """
+        if len(prefix) < self.MIN_LENGTH:
+            return []
+        ids = []
+        pos = bisect_left(self.sorted_keys, prefix)
+        while pos < len(self.sorted_keys) and self.sorted_keys[pos].startswith(prefix) and len(ids) <= limit:
+            ids.append(self.ids[pos])
+            pos += 1
+        return ids
+
+
+def prefix_variants(query: str) -> List[str]:
+    """
+    OCR文本可作为前缀查找的键：完整可见部分，以及去掉最后一个字（正在淡入、常被认错）的版本。
+    """
+    key = exact_key(query)
+    return [key, key[:-1]] if len(key) > PrefixIndex.MIN_LENGTH else [key]
+
+
+def unique_prefix(query: str, lookup: Callable[[str], List[int]],
+                  answer_of: Callable[[int], str], limit: int = PrefixIndex.MAX_SCAN) -> Tuple[str, List[int]]:
+    """
+    可见前缀唯一确定答案时返回所用前缀和以其开头的条目下标，否则下标为空列表。
+
+    以前缀开头的条目答案全部相同（包括只有一个条目）才算唯一；完整前缀有匹配但答案不唯一时
+    不再尝试更短的前缀，更短只会更不唯一。
+
+    参数:
+    query (str): OCR识别出的问题文本（可能只是开头一部分）。
+    lookup (Callable[[str], List[int]]): 前缀 -> 条目下标，最多 limit + 1 个。
+    answer_of (Callable[[int], str]): 条目下标 -> 答案。
+    limit (int): 以前缀开头的条目超过该数时视为不唯一。
+
+    返回:
+    Tuple[str, List[int]]: (所用前缀, 条目下标)。
+    """
+    for prefix in prefix_variants(query):
+        ids = lookup(prefix)
+        if not ids:
+            continue
+        if len(ids) > limit or len({answer_of(i) for i in ids}) > 1:
+            return prefix, []
+        return prefix, ids
+    return "", []
@@ -0,0 +1,357 @@
+"""
+SQLite 答案库后端，用于数百万条规模、无法整体放进内存的题库。
+
+条目存在本地数据库的 entries 表中，另建 FTS5 trigram 全文索引（外部内容表，不重复存储文本）。
+匹配时先用查询文本的三字片段在全文索引中取出排名靠前的候选，再用 rapidfuzz 计算 QRatio 得出最终结果。
+
+导入:
+    python -m core.sqlite_bank [data目录] [数据库路径]
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import json
+import os
+import queue
+import sqlite3
+import time
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+from core.bank_cache import find_sources
+from core.bank_loader import iter_entries
+from core.match_cache import MISSING, MatchCache
+from core.matcher import exact_key, joint_key, normalize_query, option_key, option_score, prefix_score
+from core.prefix_index import PrefixIndex, unique_prefix
+
+DB_PATH = "data/answers.db"
+
+_SCHEMA = """
+CREATE TABLE entries (
+    id     INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    q      TEXT NOT NULL,
+    ans    TEXT NOT NULL,
+    a      TEXT,
+    p      TEXT,
+    key    TEXT NOT NULL,
+    exact  TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE entries_fts USING fts5(key, content='entries', content_rowid='id', tokenize='trigram');
+"""
+
+
+def import_sources(db_path: str, sources: List[str], batch_size: int = 10000) -> int:
+    """
+    把题库文件一次性导入SQLite数据库（覆盖已有数据库），逐条流式读取，按批写入。
+
+    参数:
+    db_path (str): 数据库路径。
+    sources (List[str]): 题库文件路径。
+    batch_size (int): 每批写入的条目数。
+
+    返回:
+    int: 导入的条目数。
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    total = 0
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+        for src in sources:
+            start_time = time.time()
+            count, rows = 0, []
+            for entry in iter_entries(src):
+                key = utils.default_process(entry['q'])
+                options = entry.get('a')
+                rows.append((src, entry['q'], entry['ans'],
+                             json.dumps(options, ensure_ascii=False) if options is not None else None,
+                             entry.get('p'), key, exact_key(key)))
+                if len(rows) >= batch_size:
+                    conn.executemany("INSERT INTO entries (source, q, ans, a, p, key, exact) "
+                                     "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    count += len(rows)
+                    rows = []
+            conn.executemany("INSERT INTO entries (source, q, ans, a, p, key, exact) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            count += len(rows)
+            total += count
+            print(f"已导入 {src}: {count}条，耗时: {time.time() - start_time:.3f}秒")
+        start_time = time.time()
+        conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+        conn.execute("CREATE INDEX entries_exact ON entries (exact)")
+        conn.commit()
+        print(f"已建立全文索引，耗时: {time.time() - start_time:.3f}秒")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return total
+
+
+class ConnectionPool:
+    """
+    只读SQLite连接池。
+
+    sqlite3 连接不能被多个线程同时使用，每次查询从池中借出一个连接、用完归还，
+    OCRWorker 线程和主线程可以同时匹配。
+    """
+
+    def __init__(self, db_path: str, size: int = 4) -> None:
+        """
+        参数:
+        db_path (str): 数据库路径。
+        size (int): 连接数。
+        """
+        self._idle: queue.Queue = queue.Queue()
+        self.uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        for _ in range(size):
+            self._idle.put(self.connect())
+
+    def connect(self) -> sqlite3.Connection:
+        """新建一个只读连接（不属于连接池，用完由调用方关闭）"""
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class SqliteBank:
+    """
+    SQLite 答案库，匹配接口与 AnswerBank 相同（match/match_candidates/stats）。
+
+    精确哈希命中走普通索引；否则用FTS5按三字片段取 CANDIDATES 个候选再精确打分，
+    真正的最佳条目排在候选之外时会漏掉（噪声极重的OCR文本），其余情况结果与线性扫描一致。
+    数据库只读打开，不支持热加载，更新题库后重新导入。
+    """
+
+    # 全文索引取出的候选数
+    CANDIDATES = 200
+    # 按选项匹配时精确命中最多取这么多个同名题目按选项重新打分
+    OPTION_CANDIDATES = 8
+    CACHE_SIZE = 256
+
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = 4) -> None:
+        """
+        参数:
+        db_path (str): 由 import_sources 生成的数据库路径。
+        pool_size (int): 连接池大小。
+        """
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(db_path)
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        with self.pool.connection() as conn:
+            self._count = conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+        # 接口与 AnswerBank 保持一致，SQLite 后端不使用编辑距离索引和分片
+        self.edit_distance = 0
+        # 模糊匹配的打分函数（如 core.confusion.ConfusionScorer），None 表示QRatio
+        self.scorer: Optional[Callable[[str, str], float]] = None
+        self.shards: Dict[str, Any] = {}
+        self.cache = MatchCache(self.CACHE_SIZE)
+        self.counters = {"exact_hits": 0, "exact_misses": 0, "prefix_hits": 0}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """按入库顺序逐行读出全部条目，不整体载入内存；用单独的连接，遍历期间不占用匹配用的连接池"""
+        conn = self.pool.connect()
+        try:
+            for row in conn.execute("SELECT q, ans, a, p FROM entries ORDER BY id"):
+                yield self._entry(row)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _entry(row: Tuple) -> Dict[str, Any]:
+        q, ans, options, p = row
+        entry = {'q': q, 'ans': ans}
+        if options is not None:
+            entry['a'] = json.loads(options)
+        if p is not None:
+            entry['p'] = p
+        return entry
+
+    def route(self, title: Optional[str]) -> Optional[str]:
+        return None
+
+    def uses_options(self, shard: Optional[str]) -> bool:
+        return False
+
+    def prepare(self) -> None:
+        """接口与 AnswerBank 保持一致，数据库索引在导入时已建好"""
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.counters["exact_hits"] + self.counters["exact_misses"]
+        stats = dict(self.counters)
+        stats["exact_hit_rate"] = self.counters["exact_hits"] / total if total else 0.0
+        stats.update(self.cache.stats())
+        return stats
+
+    def match(self, query: str, threshold: float = 40, shard: Optional[str] = None,
+              options: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """返回最佳匹配条目，见 match_candidates"""
+        candidates = self.match_candidates(query, 1, threshold, options=options)
+        return candidates[0][0] if candidates else None
+
+    def match_candidates(self, query: str, k: int = 2, threshold: float = 40,
+                         shard: Optional[str] = None,
+                         options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        返回前k个候选及其相似度。
+
+        参数:
+        query (str): OCR识别出的问题文本。
+        k (int): 最多返回的候选数。
+        threshold (float): 最低相似度。
+        shard (str): 为与 ShardedBank 接口一致而保留，不使用。
+        options (str): OCR识别出的选项区域文本，给出时有选项的候选按问题+选项联合打分。
+
+        返回:
+        List[Tuple[Dict[str, Any], float]]: (条目, 相似度)列表，按相似度降序、同分按入库顺序。
+        """
+        if not query or len(query.strip()) < 2:
+            return []
+        query_clean = normalize_query(query)
+        if not query_clean:
+            return []
+        options_clean = option_key(options)
+        cache_key = (query_clean, threshold, k, options_clean)
+        candidates = self.cache.get(cache_key)
+        if candidates is MISSING:
+            with self.pool.connection() as conn:
+                candidates = self._search(conn, query, query_clean, k, threshold, options_clean)
+            self.cache.put(cache_key, candidates)
+        return candidates
+
+    def match_prefix(self, query: str, k: int = 2, threshold: float = 40, shard: Optional[str] = None,
+                     options: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """按可见前缀匹配，见 AnswerBank.match_prefix；前缀查找是 exact 列索引上的范围扫描"""
+        query_clean = normalize_query(query) if query and len(query.strip()) >= 2 else ""
+        if not query_clean:
+            return []
+        rows: Dict[int, Tuple] = {}
+
+        def lookup(prefix: str) -> List[int]:
+            if len(prefix) < PrefixIndex.MIN_LENGTH:
+                return []
+            # UTF-8按字节比较与按码位比较顺序一致，以 prefix 开头的键都落在 [prefix, prefix+U+10FFFF) 内
+            found = conn.execute("SELECT id, exact, q, ans, a, p FROM entries WHERE exact >= ? AND exact < ? "
+                                 "ORDER BY exact, id LIMIT ?",
+                                 (prefix, prefix + "\U0010ffff", PrefixIndex.MAX_SCAN + 1)).fetchall()
+            rows.update((row[0], row[1:]) for row in found)
+            return [row[0] for row in found]
+
+        with self.pool.connection() as conn:
+            _, ids = unique_prefix(query, lookup, lambda i: rows[i][2])
+        joint_query = joint_key(query_clean, option_key(options)) if options else ""
+        hits = []
+        for i in ids:
+            entry = self._entry(rows[i][1:])
+            hits.append((entry, prefix_score(query_clean, utils.default_process(entry['q']), joint_query,
+                                             option_key(entry.get('a')) if joint_query else "")))
+        hits = sorted((h for h in hits if h[1] >= threshold), key=lambda h: -h[1])
+        if not hits:
+            return []
+        self.counters["prefix_hits"] += 1
+        return hits[:k]
+
+    def _candidates(self, conn: sqlite3.Connection, query_clean: str) -> List[Tuple[int, str]]:
+        """全文索引取候选 (id, 归一化问题)"""
+        # trigram 分词器只能检索至少3个字符的片段，每个片段作为短语，任一命中即为候选
+        grams = {query_clean[i:i + 3] for i in range(len(query_clean) - 2)}
+        if grams:
+            expr = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+            rows = conn.execute(
+                "SELECT e.id, e.key FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? ORDER BY rank LIMIT ?", (expr, self.CANDIDATES)).fetchall()
+            if rows:
+                return rows
+        # 短文本或每三个字里都有错字时没有可用的三字片段，退回按两字片段扫描全表（较慢，结果会被缓存），
+        # 按包含的两字片段数从多到少取候选，同数按入库顺序
+        bigrams = sorted({query_clean[i:i + 2] for i in range(len(query_clean) - 1)})
+        if not bigrams:
+            return []
+        hits = " + ".join("(instr(key, ?) > 0)" for _ in bigrams)
+        return conn.execute(f"SELECT id, key FROM (SELECT id, key, {hits} AS n FROM entries) "
+                            "WHERE n > 0 ORDER BY n DESC, id LIMIT ?",
+                            (*bigrams, self.CANDIDATES)).fetchall()
+
+    def _search(self, conn: sqlite3.Connection, query: str, query_clean: str,
+                k: int, threshold: float, options_clean: str = "") -> List[Tuple[Dict[str, Any], float]]:
+        rows = conn.execute("SELECT q, ans, a, p FROM entries WHERE exact = ? ORDER BY id LIMIT ?",
+                            (exact_key(query), self.OPTION_CANDIDATES if options_clean else k)).fetchall()
+        if rows:
+            self.counters["exact_hits"] += 1
+            hits = [(self._entry(row), 100.0) for row in rows]
+            if not options_clean:
+                return hits
+            # 同名题目选项不同时按选项重新打分，没有选项的条目保持100分
+            joint_query = joint_key(query_clean, options_clean)
+            hits = [(entry, option_score(joint_query, utils.default_process(entry['q']),
+                                         option_key(entry.get('a')), score))
+                    for entry, score in hits]
+            hits = sorted((h for h in hits if h[1] >= threshold), key=lambda h: -h[1])
+            if hits:
+                return hits[:k]
+        else:
+            self.counters["exact_misses"] += 1
+        if options_clean:
+            return self._search_joint(conn, query_clean, k, threshold, options_clean)
+
+        rows = self._candidates(conn, query_clean)
+        if not rows:
+            return []
+        # 按id排序后稳定排序得分，同分取入库顺序靠前者，与线性扫描一致
+        rows.sort()
+        scores = process.cdist([query_clean], [key for _, key in rows], scorer=self.scorer or fuzz.QRatio,
+                               dtype=np.float64, workers=1)[0]
+        hits = [(float(scores[n]), n) for n in np.argsort(-scores, kind='stable')[:k]
+                if scores[n] >= threshold and scores[n] > 0]
+        ids = [rows[n][0] for _, n in hits]
+        entries = {}
+        if ids:
+            marks = ",".join("?" * len(ids))
+            for row in conn.execute(f"SELECT id, q, ans, a, p FROM entries WHERE id IN ({marks})", ids):
+                entries[row[0]] = self._entry(row[1:])
+        return [(entries[rows[n][0]], score) for score, n in hits]
+
+    def _search_joint(self, conn: sqlite3.Connection, query_clean: str,
+                      k: int, threshold: float, options_clean: str) -> List[Tuple[Dict[str, Any], float]]:
+        """按问题取候选，有选项的条目用问题+选项联合键打分（同名题目选项不同时由选项区分），没有选项的只按问题打分"""
+        rows = sorted(self._candidates(conn, query_clean))
+        if not rows:
+            return []
+        marks = ",".join("?" * len(rows))
+        records = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT id, q, ans, a, p FROM entries WHERE id IN ({marks})", [i for i, _ in rows])}
+        joint_query = joint_key(query_clean, options_clean)
+        scores = np.array([option_score(joint_query, key,
+                                        option_key(json.loads(records[i][2]) if records[i][2] else None),
+                                        fuzz.QRatio(query_clean, key))
+                           for i, key in rows], dtype=np.float64)
+        return [(self._entry(records[rows[n][0]]), float(scores[n]))
+                for n in np.argsort(-scores, kind='stable')[:k] if scores[n] >= threshold and scores[n] > 0]
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+if __name__ == "__main__":
+    # 以 python -m core.sqlite_bank [data目录] [数据库路径] 运行，一次性导入全部题库
+    import sys
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else DB_PATH
+    start_time = time.time()
+    count = import_sources(db_path, find_sources(data_dir))
+    print(f"已导入 {count} 条答案到 {db_path}，耗时: {time.time() - start_time:.3f}秒")
@@ -0,0 +1,84 @@
+from typing import List, Tuple
+from itertools import combinations
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+
+
+def deletions(text: str, max_distance: int) -> set:
+    """text 删除不超过 max_distance 个字符后得到的所有字符串（含原串）"""
+    result = {text}
+    for n in range(1, min(max_distance, len(text)) + 1):
+        for drop in combinations(range(len(text)), n):
+            result.add(''.join(ch for i, ch in enumerate(text) if i not in drop))
+    return result
+
+
+class SymSpellIndex:
+    """
+    对称删除（SymSpell）编辑距离索引。
+
+    两串编辑距离不超过d时，各自删除至多d个字符一定能得到相同的串，
+    因此预先为每个条目生成删除邻域，查询时只需生成查询串的删除邻域并查表，
+    再用 Levenshtein 距离校验候选，耗时与题库大小基本无关。
+
+    问题通常很长，只对前 PREFIX_LENGTH 个字符生成删除邻域以控制索引大小，
+    删除串以哈希值存入排好序的数组，哈希冲突带来的多余候选会在校验时被剔除。
+    """
+
+    PREFIX_LENGTH = 10
+
+    def __init__(self, keys: List[str], max_distance: int = 2) -> None:
+        """
+        参数:
+        keys (List[str]): 已归一化的问题文本，下标与答案列表一一对应。
+        max_distance (int): 最大编辑距离。
+        """
+        self.keys = keys
+        self.max_distance = max_distance
+        hashes, ids = [], []
+        for i, key in enumerate(keys):
+            if not key:
+                continue
+            for variant in deletions(key[:self.PREFIX_LENGTH], max_distance):
+                hashes.append(hash(variant))
+                ids.append(i)
+        hashes = np.array(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.ids = np.array(ids, dtype=np.int32)[order]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, query: str) -> List[Tuple[int, int]]:
+        """
+        查找编辑距离不超过 max_distance 的所有条目。
+
+        参数:
+        query (str): 已归一化的查询文本。
+
+        返回:
+        List[Tuple[int, int]]: (条目下标, 编辑距离)列表，按距离、下标升序排列。
+        """
+        if not query or len(self.hashes) == 0:
+            return []
+        probes = np.array([hash(v) for v in deletions(query[:self.PREFIX_LENGTH], self.max_distance)],
+                          dtype=np.int64)
+        left = np.searchsorted(self.hashes, probes, side='left')
+        right = np.searchsorted(self.hashes, probes, side='right')
+        candidates = set()
+        for lo, hi in zip(left.tolist(), right.tolist()):
+            if lo < hi:
+                candidates.update(self.ids[lo:hi].tolist())
+
+        results = []
+        for i in candidates:
+            key = self.keys[i]
+            # 长度差本身就是编辑距离的下界
+            if abs(len(key) - len(query)) > self.max_distance:
+                continue
+            dist = Levenshtein.distance(query, key, score_cutoff=self.max_distance)
+            if dist <= self.max_distance:
+                results.append((i, dist))
+        results.sort(key=lambda r: (r[1], r[0]))
+        return results
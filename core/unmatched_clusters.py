@@ -0,0 +1,150 @@
+"""
+未匹配问题聚类，批量生成待补充的题库条目。
+
+未匹配日志里大多是同几道题的不同OCR读法。日志中每个读法只写一次，
+出现次数取自日志的计数文件（见 core.unmatched_journal.read_hits），按归一化文本合并计数，
+再用答案库同款的字符倒排索引（NgramIndex）把相似度达到阈值的读法聚成一类：
+按出现次数从高到低取未归类的读法作为中心，一次阈值查询（NgramIndex.within）取出它的全部近邻。
+每类选与其他读法最相似的一条作为题目，去掉题库里已有的题，按该类出现总次数排序，
+输出与 data/ 下题库相同的JSON格式，
+答案留空待人工填写（'count'、'variants' 为辅助审核的额外字段）。
+
+用法:
+    python -m core.unmatched_clusters [--unmatched data/unmatched_questions.txt] [--data data] [--output candidates.json]
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from collections import Counter
+import argparse
+import contextlib
+import json
+import sys
+import time
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+from core.matcher import exact_key, normalize_query
+from core.ngram_index import NgramIndex
+
+# 选代表读法时最多比较的成员数
+MEDOID_SAMPLE = 64
+
+
+def count_variants(lines: Iterable[str], min_length: int = 4, hits: Optional[Dict[str, int]] = None) -> Counter:
+    """
+    按 normalize_query 归一化后计数，过短的读法（多半是误识别的碎片）丢弃。
+
+    参数:
+    lines (Iterable[str]): 日志中的问题。
+    min_length (int): 归一化后短于该长度的读法丢弃。
+    hits (Dict[str, int]): exact_key -> 记录次数（read_hits），没有的读法每行按1次计。
+
+    返回:
+    Counter: 归一化读法 -> 出现次数。
+    """
+    hits = hits or {}
+    counts: Counter = Counter()
+    for line in lines:
+        key = normalize_query(line)
+        if len(key) >= min_length:
+            counts[key] += hits.get(exact_key(line), 1)
+    return counts
+
+
+def drop_known(clusters: List[Dict[str, Any]], bank_keys: List[str], threshold: float = 90) -> List[Dict[str, Any]]:
+    """
+    去掉题库里已有的类（当时题库还没有、后来已补充的题）。
+
+    同类读法彼此相似，只需用代表读法和出现最多的读法查题库，比逐条读法查快一两个数量级。
+    """
+    if not bank_keys:
+        return clusters
+    index = NgramIndex(bank_keys)
+    return [c for c in clusters
+            if all(index.best(key, threshold) is None for key in {c["q"], c["variants"][0]})]
+
+
+def medoid(members: List[str]) -> str:
+    """与其他成员平均相似度最高的读法"""
+    sample = members[:MEDOID_SAMPLE]
+    if len(sample) <= 2:
+        return sample[0]
+    scores = process.cdist(sample, sample, scorer=fuzz.QRatio, dtype=np.float64, workers=-1)
+    return sample[int(np.argmax(scores.sum(axis=1)))]
+
+
+def cluster(counts: Counter, threshold: float = 80) -> List[Dict[str, Any]]:
+    """
+    把读法聚类。
+
+    参数:
+    counts (Counter): 归一化读法 -> 出现次数。
+    threshold (float): 与类中心的QRatio不低于该值的读法归入该类。
+
+    返回:
+    List[Dict[str, Any]]: 每类 {"q": 代表读法, "count": 出现总次数, "variants": 按次数降序的读法}，按 count 降序。
+    """
+    keys = [key for key, _ in counts.most_common()]
+    index = NgramIndex(keys)
+    assigned = np.zeros(len(keys), dtype=bool)
+    clusters = []
+    for center in range(len(keys)):
+        if assigned[center]:
+            continue
+        # 只取阈值以上的未归类近邻，不对整个索引做 top_k
+        members = [i for i, _ in index.within(keys[center], threshold, exclude=assigned)]
+        if center not in members:
+            members.append(center)
+        assigned[members] = True
+        # keys 按次数降序，下标小的读法出现次数多
+        variants = [keys[i] for i in sorted(members)]
+        clusters.append({"q": medoid(variants), "count": sum(counts[v] for v in variants), "variants": variants})
+    clusters.sort(key=lambda c: -c["count"])
+    return clusters
+
+
+def to_entries(clusters: List[Dict[str, Any]], min_count: int = 1, max_variants: int = 5) -> List[Dict[str, Any]]:
+    """转为题库条目格式，答案留空"""
+    return [{"q": c["q"], "ans": "", "count": c["count"], "variants": c["variants"][:max_variants]}
+            for c in clusters if c["count"] >= min_count]
+
+
+def dump_entries(entries: List[Dict[str, Any]], file) -> None:
+    """按 data/ 下题库的样式写出：JSON数组，每行一个条目"""
+    file.write("[\n")
+    file.write(",\n".join(json.dumps(e, ensure_ascii=False) for e in entries))
+    file.write("\n]\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--unmatched', default='data/unmatched_questions.txt')
+    parser.add_argument('--data', default='data', help='题库目录，已能匹配的读法不再输出；为空时不过滤')
+    parser.add_argument('--threshold', type=float, default=80, help='读法与类中心的最低相似度')
+    parser.add_argument('--known', type=float, default=90, help='与题库问题相似度达到该值视为已有')
+    parser.add_argument('--min-count', type=int, default=1)
+    parser.add_argument('--output', default='', help='写入文件，默认输出到标准输出（不要直接写进 data/，答案还是空的）')
+    args = parser.parse_args(argv)
+
+    from core.bank_cache import find_sources
+    from core.bank_loader import iter_entries
+    from core.unmatched_journal import read_hits, read_journal
+    start_time = time.time()
+    counts = count_variants(read_journal(args.unmatched), hits=read_hits(args.unmatched))
+    clusters = cluster(counts, args.threshold)
+    total = len(clusters)
+    if args.data:
+        # 题库解析的错误提示转到标准错误，标准输出只留结果
+        with contextlib.redirect_stdout(sys.stderr):
+            bank_keys = [utils.default_process(e['q']) for src in find_sources(args.data) for e in iter_entries(src)]
+        clusters = drop_known(clusters, bank_keys, args.known)
+    entries = to_entries(clusters, args.min_count)
+    print(f"读法 {len(counts)} 条，聚为 {total} 类，去掉题库已有后 {len(clusters)} 类，"
+          f"输出 {len(entries)} 条，耗时: {time.time() - start_time:.3f}秒", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            dump_entries(entries, f)
+    else:
+        dump_entries(entries, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+未匹配问题日志。
+
+OCR每帧都可能产生未匹配问题，同一道题会在屏幕上停留多帧。记录时只把问题放入队列，
+后台线程按归一化后的问题去重、攒批写入文件，文件超过大小上限时压缩归档，
+界面线程和OCR线程不做任何文件操作。
+日志里每个读法只出现一次，各读法被记录的次数另存在旁边的计数文件（<文件名>.counts.json），
+聚类时按它排出真正最常遇到的题（见 core.unmatched_clusters）。
+"""
+from typing import Dict, Iterator, List
+from collections import Counter
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from core.matcher import exact_key
+
+
+def journal_files(path: str) -> List[str]:
+    """日志的全部文件：按时间排序的压缩归档，最后是当前文件"""
+    root, ext = os.path.splitext(path)
+    files = sorted(glob.glob(f"{glob.escape(root)}-*{ext}.gz"))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def counts_path(path: str) -> str:
+    """日志的计数文件路径"""
+    return os.path.splitext(path)[0] + ".counts.json"
+
+
+def read_hits(path: str) -> Counter:
+    """
+    读出日志中各读法（按 exact_key）被记录的次数。
+
+    计数文件不存在或损坏时（旧版本写的日志）返回空计数，调用方把每条记录按1次计。
+    """
+    try:
+        with open(counts_path(path), 'r', encoding='utf-8') as f:
+            return Counter({key: int(n) for key, n in json.load(f).items()})
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        if os.path.exists(counts_path(path)):
+            print(f"读取未匹配问题计数失败: {counts_path(path)} | {e}")
+        return Counter()
+
+
+def read_journal(path: str) -> Iterator[str]:
+    """逐行读出日志中的问题（含压缩归档），去掉行尾换行，跳过空行"""
+    for file in journal_files(path):
+        opener = gzip.open if file.endswith(".gz") else open
+        with opener(file, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
+
+
+class UnmatchedJournal:
+    """
+    带缓冲的后台未匹配问题日志。
+
+    record 只入队；后台线程启动时先读入已有记录用于去重和计数，重复的读法只累加次数，
+    之后每 flush_interval 秒或攒满 batch_size 条写一次文件，计数有变化时一并重写计数文件。
+    """
+
+    def __init__(self, path: str = "data/unmatched_questions.txt", flush_interval: float = 2.0,
+                 batch_size: int = 64, max_bytes: int = 1024 * 1024) -> None:
+        """
+        参数:
+        path (str): 日志文件路径。
+        flush_interval (float): 最长多少秒写一次文件。
+        batch_size (int): 缓冲满这么多条时立即写入。
+        max_bytes (int): 当前文件超过该大小时压缩归档为 <文件名>-<时间>.txt.gz，0 表示不归档。
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.seen = set()
+        # exact_key -> 被记录的次数，只在后台线程中修改
+        self.hits: Counter = Counter()
+        self.counters = {"recorded": 0, "duplicates": 0, "flushes": 0, "rotations": 0}
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="UnmatchedJournal", daemon=True)
+        self._thread.start()
+        # 后台线程是守护线程，解释器退出时会直接结束；没有显式 close 时在退出前写完缓冲
+        atexit.register(self.close)
+
+    def record(self, question: str) -> None:
+        """记录一个未匹配问题（任意线程调用，不阻塞）"""
+        if question:
+            self._queue.put(question.replace('\n', ' '))
+
+    def close(self, timeout: float = 2.0) -> None:
+        """写入缓冲中的全部问题并停止后台线程，可重复调用"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters, pending=self._queue.qsize())
+
+    def _run(self) -> None:
+        self.hits = read_hits(self.path)
+        for line in read_journal(self.path):
+            key = exact_key(line)
+            self.seen.add(key)
+            # 没有计数文件时已有记录各按1次计
+            self.hits[key] = self.hits[key] or 1
+        pending: List[str] = []
+        dirty = False
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ""
+            key = exact_key(item) if item else ""
+            if key:
+                self.hits[key] += 1
+                dirty = True
+                if key in self.seen:
+                    self.counters["duplicates"] += 1
+                else:
+                    self.seen.add(key)
+                    pending.append(item)
+            if item is None or len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                if dirty:
+                    self._flush(pending)
+                    pending, dirty = [], False
+                deadline = time.monotonic() + self.flush_interval
+            if item is None:
+                return
+
+    def _flush(self, lines: List[str]) -> None:
+        """追加新读法，再重写计数文件"""
+        try:
+            if lines:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                self.counters["recorded"] += len(lines)
+                if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+                    self._rotate()
+            self._write_hits()
+            self.counters["flushes"] += 1
+        except OSError as e:
+            print(f"记录未匹配问题失败: {e}")
+
+    def _write_hits(self) -> None:
+        """整体重写计数文件，先写临时文件再替换，写到一半退出不会留下损坏的计数"""
+        path = counts_path(self.path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.hits, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def _rotate(self) -> None:
+        root, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        archive, n = f"{root}-{stamp}{ext}.gz", 1
+        while os.path.exists(archive):
+            archive, n = f"{root}-{stamp}-{n}{ext}.gz", n + 1
+        with open(self.path, 'rb') as src, gzip.open(archive, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+        self.counters["rotations"] += 1
+        print(f"未匹配问题日志已归档: {archive}")
@@ -145,6 +145,20 @@ class WindowHandler:
             return img_array
         return None
     
+    @require_window
+    def capture_options_screenshot(self) -> ndarray:
+        """
+        捕获当前窗口选项按钮所在区域的截图（与 click_trueorfalse 的按钮位置对应）。
+
+        返回:
+        ndarray: 截图数组。
+        """
+        x1 = int(self.window.left)
+        y1 = int(740/970*(self.window.bottom - self.window.top))
+        x2 = int(self.window.right)
+        y2 = int(830/970*(self.window.bottom - self.window.top))
+        return self.capture_screenshot_ext(x1, y1, x2, y2)
+
     def capture_screenshot_ext(self,x1,y1,x2,y2) -> ndarray:
         """
         捕获当前窗口的截图并返回ndarray。
@@ -1,56 +1,21 @@
 from PyQt5.QtWidgets import (QPushButton, QLabel, QVBoxLayout,
-                            QHBoxLayout, QTextEdit, QWidget, QLineEdit, QGroupBox)
-from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal, QThread, pyqtSlot, QMutex, QMutexLocker  
+                            QHBoxLayout, QTextEdit, QWidget, QLineEdit, QGroupBox, QComboBox)
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal, QThread, pyqtSlot, QMutex, QMutexLocker, QCoreApplication  
 import os
 import keyboard
 import time
+from collections.abc import Mapping
 # import psutil
-from core.ocr import Ocr
+from core.ocr_pool import ocr_pool
 from core.winoperator import WinOperator
 from core.winhandler import WindowHandler
-from rapidfuzz import fuzz, utils
-import json
-
-# ========== 简化版匹配函数 ==========
-def find_best_match_simple(properties, query, threshold=40):
-    if not query or len(query.strip()) < 2:
-        return None
-    
-    query_clean = utils.default_process(query).replace("咸鱼游戏", "").strip()
-    if not query_clean:
-        return None
-    
-    best_score = 0
-    best_prop = None
-    
-    for prop in properties:
-        q_clean = utils.default_process(prop['q'])
-        score = fuzz.QRatio(query_clean, q_clean)
-        
-        if score >= threshold and score > best_score:
-            best_score = score
-            best_prop = prop
-    
-    return best_prop
-
-def parse_json_lines(file_path):
-    """解析JSON文件（兼容单行/数组格式）"""
-    json_list = []
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-        try:
-            data = json.loads(content)
-            if isinstance(data, list):
-                return data
-        except json.JSONDecodeError:
-            file.seek(0)
-            for line in file:
-                try:
-                    json_data = json.loads(line)
-                    json_list.append(json_data)
-                except json.JSONDecodeError as e:
-                    print(f"解析JSON行错误: {line} | {e}")
-    return json_list
+from core.bank_shards import ShardedBank
+from core.confusion import CONFUSION_PATH, ConfusionScorer
+from core.sqlite_bank import DB_PATH, SqliteBank
+from core.bank_watcher import BankWatcher
+from core.frame_gate import FrameGate
+from core.matcher import exact_key, score_margin
+from core.unmatched_journal import UnmatchedJournal
 
 # ========== 重构后的OCR Worker（全流程在线程内执行） ==========
 class OCRWorker(QThread):
@@ -59,12 +24,15 @@ class OCRWorker(QThread):
     error_occurred = pyqtSignal(str)        # 错误信息
     status_updated = pyqtSignal(str)        # 状态更新（如"截图中"）
     
-    def __init__(self, answer_set, selected_region=None, interval=1.0):
+    def __init__(self, answer_bank, selected_region=None, interval=1.0, min_margin=5.0):
         super().__init__()
         # 配置参数
-        self.answer_set = answer_set
+        self.answer_bank = answer_bank
         self.selected_region = selected_region
         self.interval = interval  # 线程内处理间隔（秒）
+        self.min_margin = min_margin  # 第一名领先第二名的相似度差达到该值才自动点击
+        self.shard = None  # 优先匹配的题库分片，None 表示全局查找
+        self.options_region = None  # 选项区域，设置后与问题一起联合匹配
         
         # 控制状态
         self._is_running = False
@@ -78,7 +46,13 @@ class OCRWorker(QThread):
         
         # 性能优化
         self.last_question = ""
+        self.last_options = None
+        # 最近一次自动点击的条目(问题, 答案)：淡入中的题目每帧读到的开头都不同，同一题只点一次
+        self.last_clicked = None
         self.min_interval = 0.3
+        # 截图没有变化时跳过OCR，问题和选项区域各自检测
+        self.frame_gate = FrameGate()
+        self.options_gate = FrameGate()
         self.last_process_time = 0
 
     def start_worker(self):
@@ -86,6 +60,7 @@ class OCRWorker(QThread):
         with QMutexLocker(self._mutex):
             self._stop_flag = False
             self._is_running = True
+        self.last_clicked = None
         if not self.isRunning():
             self.start()
 
@@ -103,11 +78,28 @@ class OCRWorker(QThread):
         """更新截图区域（线程安全）"""
         with QMutexLocker(self._mutex):
             self.selected_region = region
+        self.frame_gate.reset()
+
+    def set_options_region(self, region):
+        """更新选项区域（线程安全），None 表示只按问题匹配"""
+        with QMutexLocker(self._mutex):
+            self.options_region = region
+        self.options_gate.reset()
+
+    def set_shard(self, shard):
+        """更新优先匹配的题库分片（线程安全）"""
+        with QMutexLocker(self._mutex):
+            self.shard = shard
+
+    def set_answer_bank(self, answer_bank):
+        """替换答案库（写时复制的新对象，直接替换引用，匹配路径无需加锁）"""
+        self.answer_bank = answer_bank
 
     def run(self):
         """线程主循环（全流程在线程内执行）"""
         # 线程内初始化工具（避免跨线程创建Qt/系统资源）
-        self.ocr = Ocr()
+        # 从共享引擎池借出已加载并预热的OCR引擎（复用文本检测框），反复启停不重新加载模型
+        self.ocr = ocr_pool().acquire()
         self.handler = WindowHandler()
         self.operator = WinOperator()
 
@@ -129,36 +121,56 @@ class OCRWorker(QThread):
                 # 步骤1：截图（线程内执行）
                 self.status_updated.emit("正在截图...")
                 screenshot_data = self._capture_screenshot()
+                options_data = self._capture_options()
                 # if not screenshot_data:
                 #     self.last_process_time = current_time
                 #     time.sleep(self.interval)
                 #     continue
 
-                # 步骤2：OCR识别（线程内执行）
+                # 画面没有变化时OCR结果也不会变，跳过整个识别（两个区域都要检测，以更新各自的基准帧）
+                question_changed = self.frame_gate.changed(screenshot_data)
+                options_changed = options_data is not None and self.options_gate.changed(options_data)
+                if not question_changed and not options_changed:
+                    self.status_updated.emit(f"画面未变化，跳过OCR (跳过率: {self.frame_gate.stats()['skip_ratio']:.0%})")
+                    self.last_process_time = current_time
+                    time.sleep(self.interval)
+                    continue
+
+                # 步骤2：OCR识别（线程内执行），选择了选项区域时与问题一次批量识别，联合匹配
                 self.status_updated.emit("正在OCR识别...")
-                question = self._do_ocr(screenshot_data)
+                question, options = self._do_ocr(screenshot_data, options_data)
                 if not question:
+                    # 题目区域清空说明换题了，下一题即使与上一题相同也要点击
+                    self.last_clicked = None
                     self.last_process_time = current_time
                     time.sleep(self.interval)
                     continue
 
-                # 去重：跳过重复问题
-                if question == self.last_question:
+                # 去重：跳过重复问题（问题和选项都相同）
+                if question == self.last_question and options == self.last_options:
                     self.last_process_time = current_time
                     time.sleep(self.interval)
                     continue
                 self.last_question = question
+                self.last_options = options
 
                 # 步骤3：答案匹配（线程内执行）
                 self.status_updated.emit("正在匹配答案...")
-                answer = self._match_answer(question)
+                answer, margin = self._match_answer(question, options)
 
                 # 步骤4：发送结果（通过信号传递到主线程）
                 self.result_ready.emit(question, answer)
 
                 # 步骤5：自动点击（可选，线程内执行）
-                if answer:
-                    self._auto_click_answer(answer)
+                if answer and margin >= self.min_margin:
+                    clicked = (answer['q'], answer['ans'])
+                    if clicked != self.last_clicked:
+                        self._auto_click_answer(answer)
+                        self.last_clicked = clicked
+                elif answer:
+                    # 前两名太接近，宁可等下一帧重新识别也不点错
+                    self.status_updated.emit(f"候选答案相近(领先{margin:.1f}分)，等待下一帧确认")
+                    self.last_question = ""
 
                 # 更新时间戳
                 self.last_process_time = current_time
@@ -166,12 +178,16 @@ class OCRWorker(QThread):
             except Exception as e:
                 self.error_occurred.emit(f"处理错误: {str(e)}")
                 self.last_process_time = current_time
+                # 出错的帧下次要重新识别
+                self.frame_gate.reset()
+                self.options_gate.reset()
 
             # 线程循环间隔
             time.sleep(self.interval)
 
-        # 线程结束清理
+        # 线程结束清理，引擎归还给引擎池
         self.status_updated.emit("线程已停止")
+        ocr_pool().release(self.ocr)
         self.ocr = None
         self.handler = None
         self.operator = None
@@ -187,41 +203,103 @@ class OCRWorker(QThread):
         else:
             return self.handler.capture_question_screenshot()
 
-    def _do_ocr(self, screenshot_data):
-        """线程内OCR识别"""
+    def _do_ocr(self, screenshot_data, options_data=None):
+        """线程内OCR识别，返回(问题, 选项)，未设置选项区域时选项为None"""
         try:
             start_time = time.time()
-            question = ''.join(self.ocr.do_ocr_ext(screenshot_data, simple=True))
-            question = question.replace("咸鱼游戏", "").strip()
+            if options_data is None:
+                question, options = self.ocr.do_ocr_ext(screenshot_data, simple=True), None
+            else:
+                # 两个区域的文本行合并成一次识别推理
+                question, options = self.ocr.do_ocr_batch([screenshot_data, options_data], simple=True)
+                options = ''.join(options).replace("咸鱼游戏", "").strip() or None
+            question = ''.join(question).replace("咸鱼游戏", "").strip()
             ocr_time = time.time() - start_time
-            self.status_updated.emit(f"OCR耗时: {ocr_time:.3f}秒")
-            return question
+            layout = self.ocr.layout_stats
+            self.status_updated.emit(f"OCR耗时: {ocr_time:.3f}秒 (复用检测框: {layout['reused']}/"
+                                     f"{layout['reused'] + layout['detections']})")
+            return question, options
         except Exception as e:
             self.error_occurred.emit(f"OCR识别失败: {str(e)}")
-            return ""
+            return "", None
+
+    def _capture_options(self):
+        """线程内截取选项区域，未设置选项区域时返回None"""
+        with QMutexLocker(self._mutex):
+            region = self.options_region
+        if not region:
+            return None
+        x1, y1, x2, y2 = region
+        return self.handler.capture_screenshot_ext(x1, y1, x2, y2)
 
-    def _match_answer(self, question):
-        """线程内答案匹配"""
+    def _match_answer(self, question, options=None):
+        """线程内答案匹配，返回(最佳条目, 领先第二名的相似度差)"""
         try:
             start_time = time.time()
-            answer = find_best_match_simple(self.answer_set, question)
+            answer_bank = self.answer_bank
+            with QMutexLocker(self._mutex):
+                shard = self.shard
+            candidates = answer_bank.match_candidates(question, k=3, shard=shard, options=options)
+            # 题目逐字出现时只读到开头，可见前缀已能唯一确定答案就不必再等一个轮询间隔；
+            # 截断的文本整题模糊匹配反而容易高分匹配到措辞相近的别的题。前缀得分也是相似度，
+            # 与整题候选合并后算领先分，整题匹配到答案不同的题时照样要求足够领先
+            prefix_hits = answer_bank.match_prefix(question, shard=shard, options=options)
+            if prefix_hits:
+                candidates = sorted(prefix_hits + candidates, key=lambda c: -c[1])
+                visible = len(exact_key(question)) / max(1, len(exact_key(prefix_hits[0][0]['q'])))
+                self.status_updated.emit(f"前缀命中(已显示{min(visible, 1.0):.0%})")
+            answer = candidates[0][0] if candidates else None
             # answer = {"q": question, "ans": "三国演义"}  # 测试用固定值
             match_time = time.time() - start_time
-            self.status_updated.emit(f"匹配耗时: {match_time:.3f}秒")
-            return answer
+            stats = answer_bank.stats()
+            self.status_updated.emit(f"匹配耗时: {match_time:.3f}秒 (缓存命中率: {stats['cache_hit_rate']:.0%}, "
+                                     f"精确命中率: {stats['exact_hit_rate']:.0%}, "
+                                     f"画面未变跳过率: {self.frame_gate.stats()['skip_ratio']:.0%})")
+            return answer, score_margin(candidates)
         except Exception as e:
             self.error_occurred.emit(f"答案匹配失败: {str(e)}")
-            return None
+            return None, 0.0
 
     def _auto_click_answer(self, answer):
         """线程内自动点击答案"""
         try:
-            if isinstance(answer, dict) and 'ans' in answer:
+            if isinstance(answer, Mapping) and 'ans' in answer:
                 self.operator.click_trueorfalse(answer['ans'])
                 self.status_updated.emit(f"已自动点击答案: {answer['ans']}")
         except Exception as e:
             self.error_occurred.emit(f"自动点击失败: {str(e)}")
 
+# ========== 题库热加载线程 ==========
+class BankReloadWorker(QThread):
+    bank_updated = pyqtSignal(object)  # 新答案库
+
+    def __init__(self, watcher, interval=2.0):
+        super().__init__()
+        self.watcher = watcher
+        self.interval = interval
+        self._stop_flag = False
+
+    def stop_worker(self):
+        """停止线程并等待退出（正在重建索引时等它完成），线程对象销毁前必须调用"""
+        self._stop_flag = True
+        if self.isRunning():
+            self.wait()
+
+    def run(self):
+        """定期检查 data/ 目录，解析和建索引都在本线程完成"""
+        while not self._stop_flag:
+            try:
+                bank = self.watcher.poll()
+                if bank is not None:
+                    self.bank_updated.emit(bank)
+            except Exception as e:
+                print(f"题库热加载失败: {e}")
+            # 分段休眠，退出时不必等满一个检查间隔
+            for _ in range(max(1, int(self.interval * 10))):
+                if self._stop_flag:
+                    break
+                self.msleep(100)
+
 # ========== 悬浮窗（无修改） ==========
 class FloatingWindow(QWidget):
     def __init__(self, parent=None):
@@ -245,15 +323,19 @@ class OCRFeature(QObject):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
-        self.answer_set = []
+        self.answer_bank = ShardedBank({})
         self.floating_window = None
         self.unmatched_file = "data/unmatched_questions.txt"
+        # 未匹配问题在后台线程去重、批量写入，界面线程不做文件操作
+        self.unmatched_journal = UnmatchedJournal(self.unmatched_file)
         self.running = False
         
         self.load_answers()
+        # 后台加载并预热OCR模型，第一次按下开始时不必再等模型加载
+        ocr_pool().warm_up()
         
         self.ocr_worker = OCRWorker(
-            answer_set=self.answer_set,
+            answer_bank=self.answer_bank,
             interval=1.0
         )
         self.ocr_worker.result_ready.connect(self.on_result_ready)
@@ -262,6 +344,17 @@ class OCRFeature(QObject):
         
         self.selected_region = None
         self.floating_window = FloatingWindow()
+
+        # SQLite题库只读，更新后需重新导入，不做热加载
+        self.reload_worker = None
+        if not isinstance(self.answer_bank, SqliteBank):
+            self.reload_worker = BankReloadWorker(BankWatcher(self.answer_bank, "data"))
+            self.reload_worker.bank_updated.connect(self.on_bank_updated)
+            self.reload_worker.start()
+        # 退出前显式停止后台线程（QThread 在运行中被销毁会直接终止程序），并把缓冲中的未匹配问题写入文件
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
         
     def create_ui(self):
         from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout
@@ -277,6 +370,14 @@ class OCRFeature(QObject):
         window_layout.addWidget(self.window_label)
         layout.addLayout(window_layout)
         
+        shard_layout = QHBoxLayout()
+        shard_layout.addWidget(QLabel('题库:'))
+        self.shard_combo = QComboBox()
+        self.fill_shard_combo()
+        self.shard_combo.currentIndexChanged.connect(self.on_shard_changed)
+        shard_layout.addWidget(self.shard_combo)
+        layout.addLayout(shard_layout)
+
         region_layout = QHBoxLayout()
         self.region_btn = QPushButton('选择区域')
         self.region_btn.clicked.connect(self.choose_region)
@@ -284,6 +385,14 @@ class OCRFeature(QObject):
         region_layout.addWidget(self.region_btn)
         region_layout.addWidget(self.region_label)
         layout.addLayout(region_layout)
+
+        options_layout = QHBoxLayout()
+        self.options_btn = QPushButton('选择选项区域')
+        self.options_btn.clicked.connect(self.choose_options_region)
+        self.options_label = QLabel('未选择选项区域（只按问题匹配）')
+        options_layout.addWidget(self.options_btn)
+        options_layout.addWidget(self.options_label)
+        layout.addLayout(options_layout)
         
         control_layout = QHBoxLayout()
         self.start_btn = QPushButton('启动 (Home)')
@@ -303,15 +412,22 @@ class OCRFeature(QObject):
         """加载答案库（主线程执行一次）"""
         print("正在加载答案数据...")
         start_time = time.time()
-        for root, dirs, files in os.walk("data"):
-            for file in files:
-                if file.endswith(".txt"):
-                    file_path = os.path.join(root, file)
-                    self.answer_set.extend(parse_json_lines(file_path))
+        if os.path.exists(DB_PATH):
+            # 已导入SQLite的超大题库（python -m core.sqlite_bank），不占用内存
+            self.answer_bank = SqliteBank(DB_PATH)
+        else:
+            # 按游戏分片加载，优先映射加载预编译缓存，源文件有更新时才重新解析并建立索引
+            self.answer_bank = ShardedBank.load("data")
+        # OCR错一两个字时用编辑距离索引直接定位，索引在这里建好，不在OCR线程第一次未命中时现建
+        self.answer_bank.edit_distance = 2
+        # 学习过OCR混淆表（python -m core.confusion）时，模糊匹配对形近字的替换少扣分
+        if os.path.exists(CONFUSION_PATH):
+            self.answer_bank.scorer = ConfusionScorer.load(CONFUSION_PATH)
+        self.answer_bank.prepare()
         load_time = time.time() - start_time
-        print(f"答案数据加载完成，共{len(self.answer_set)}条，耗时: {load_time:.3f}秒")
+        print(f"答案数据加载完成，共{len(self.answer_bank)}条，耗时: {load_time:.3f}秒")
         if hasattr(self.parent, 'update_question_count'):
-            self.parent.update_question_count(len(self.answer_set))
+            self.parent.update_question_count(len(self.answer_bank))
 
     def choose_window(self):
         try:
@@ -319,12 +435,32 @@ class OCRFeature(QObject):
             handler.choose_window()
             handler.move_and_resize_window(1390, 10, 527, 970)
             self.window_label.setText("已选择窗口")
+            # 按窗口标题切换到对应游戏的题库分片
+            shard = self.answer_bank.route(handler.window.title)
+            if shard:
+                self.shard_combo.setCurrentIndex(self.shard_combo.findData(shard))
             self.start_btn.setEnabled(True)
         except Exception as e:
             self.window_label.setText("窗口选择失败")
             if hasattr(self, 'result_display') and self.result_display:
                 self.result_display.setText(f"窗口选择错误: {str(e)}")
 
+    def fill_shard_combo(self):
+        """按当前答案库的分片重建下拉框，原选中的分片仍存在时保持选中，否则回到全部题库"""
+        current = self.shard_combo.currentData()
+        self.shard_combo.blockSignals(True)
+        self.shard_combo.clear()
+        self.shard_combo.addItem('全部题库', None)
+        for shard in self.answer_bank.shards:
+            self.shard_combo.addItem(shard, shard)
+        self.shard_combo.setCurrentIndex(max(0, self.shard_combo.findData(current)))
+        self.shard_combo.blockSignals(False)
+        if self.shard_combo.currentData() != current:
+            self.on_shard_changed(self.shard_combo.currentIndex())
+
+    def on_shard_changed(self, index):
+        self.ocr_worker.set_shard(self.shard_combo.itemData(index))
+
     def choose_region(self):
         operator = WinOperator()
         self.selected_region = operator.select_screen_region()
@@ -335,6 +471,16 @@ class OCRFeature(QObject):
         else:
             self.region_label.setText("未选择区域")
 
+    def choose_options_region(self):
+        """选择选项所在区域，题目措辞相近时靠选项区分"""
+        operator = WinOperator()
+        region = operator.select_screen_region()
+        if region:
+            self.options_label.setText(f"已选择选项区域: {region}")
+        else:
+            self.options_label.setText("未选择选项区域（只按问题匹配）")
+        self.ocr_worker.set_options_region(region)
+
     def toggle(self):
         if self.running:
             self.stop()
@@ -378,6 +524,16 @@ class OCRFeature(QObject):
         if self.floating_window:
             self.floating_window.update_result(result_text)
 
+    def on_bank_updated(self, answer_bank):
+        """题库文件变化后切换到新答案库（主线程执行）"""
+        self.answer_bank = answer_bank
+        self.ocr_worker.set_answer_bank(answer_bank)
+        # 热加载可能增删了分片（新增或删除题库文件），下拉框跟着更新，已删除的分片不能再被选中路由
+        if hasattr(self, 'shard_combo'):
+            self.fill_shard_combo()
+        if hasattr(self.parent, 'update_question_count'):
+            self.parent.update_question_count(len(answer_bank))
+
     def on_error_occurred(self, error_msg):
         """接收错误信息（主线程显示）"""
         if hasattr(self, 'result_display') and self.result_display:
@@ -390,20 +546,20 @@ class OCRFeature(QObject):
         print(f"Worker状态: {status}")
 
     def record_unmatched_question(self, question):
-        """记录未匹配问题（主线程执行）"""
-        if not question:
-            return
-        try:
-            os.makedirs("data", exist_ok=True)
-            with open(self.unmatched_file, 'a', encoding='utf-8') as f:
-                f.write(question + '\n')
-            print(f"已记录未匹配问题: {question}")
-        except Exception as e:
-            print(f"记录未匹配问题失败: {e}")
+        """记录未匹配问题（只入队，去重和写文件在日志线程执行）"""
+        self.unmatched_journal.record(question)
+
+    def shutdown(self):
+        """程序退出前停止后台线程并写完未匹配日志（aboutToQuit 时调用，可重复调用）"""
+        self.ocr_worker.stop_worker()
+        if self.reload_worker:
+            self.reload_worker.stop_worker()
+            self.reload_worker = None
+        self.unmatched_journal.close()
 
     def __del__(self):
         """析构：确保线程停止"""
-        self.stop_worker()
+        self.shutdown()
         if self.floating_window:
             self.floating_window.close()
         keyboard.remove_hotkey('F1')
\ No newline at end of file
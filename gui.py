@@ -6,6 +6,7 @@ from PyQt5.QtCore import Qt, QMetaObject, QObject, Q_ARG, QTimer, QDateTime
 from PyQt5.QtGui import QIcon, QFont
 import sys
 import json
+import multiprocessing
 import os
 import keyboard
 from datetime import datetime, timedelta
@@ -205,6 +206,8 @@ class QSearchApp(BaseGUI):
         self.right_layout.addStretch()
 
 if __name__ == '__main__':
+    # 打包后的程序在子进程中解析题库时需要
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     # 设置应用样式
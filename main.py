@@ -1,9 +1,10 @@
 import time
-from core.ocr import Ocr
-from core.winoperator import WinOperator
-from core.winhandler import WindowHandler
+from core.bank_shards import ShardedBank
+from core.confusion import CONFUSION_PATH, ConfusionScorer
+from core.frame_gate import FrameGate
+from core.sqlite_bank import DB_PATH, SqliteBank
 from fuzzywuzzy import process
-import json
+import multiprocessing
 import os
 import requests
 
@@ -21,22 +22,7 @@ def find_best_match(properties, query):
     return None
 
 
-def parse_json_lines(file_path):
-
-    #返回一个json列表
-    json_list = []
-    with open(file_path, 'r', encoding='utf-8') as file:
-        for line in file:
-            try:
-                json_data = json.loads(line)
-                json_list.append(json_data)
-                # yield json_data
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON on line: {line}")
-                print(e)
-        return json_list
-    
-def run_select_region(handler, operator, ocr, answer_set):
+def run_select_region(handler, operator, ocr, answer_bank, shard=None):
 
     x1, y1, x2, y2 = operator.select_screen_region()
     time_delay = 0.5
@@ -48,7 +34,7 @@ def run_select_region(handler, operator, ocr, answer_set):
         if len(question)==0: 
             time.sleep(time_delay)
             continue
-        answer = find_best_match(answer_set, question)
+        answer = answer_bank.match(question, shard=shard)
         if answer is not None:
             print(answer['q'] + ' ---> ' +answer['ans'])
             operator.click_trueorfalse(answer['ans'])
@@ -57,38 +43,65 @@ def run_select_region(handler, operator, ocr, answer_set):
         time.sleep(time_delay)
     
 def main():
+    #OCR模型和窗口操作只在运行时导入，基准测试等无界面环境可以直接导入 find_best_match
+    from core.ocr_pool import ocr_pool
+    from core.winoperator import WinOperator
+    from core.winhandler import WindowHandler
 
     handler = WindowHandler()
 
-    ocr = Ocr()
+    #与GUI共用引擎池，引擎加载后先预热，复用文本检测框
+    ocr = ocr_pool().acquire()
     
     handler.choose_window()
     handler.move_and_resize_window(1390,10,527,970)
     operator = WinOperator(handler.window)
     # handler.capture_screenshot()
-    #遍历文件夹下所有文件，并返回文件路径
-    results = []
-    for root, dirs, files in os.walk("data"):
-        for file in files:
-            file_path = os.path.join(root, file)
-            result = parse_json_lines(file_path)
-            results.extend(result)
+    #遍历题库目录（与GUI相同的加载器和文件集合），按游戏分片，缓存比源文件新时直接映射加载
+    #已导入SQLite的超大题库优先（python -m core.sqlite_bank）
+    answer_bank = SqliteBank(DB_PATH) if os.path.exists(DB_PATH) else ShardedBank.load("data")
+    #学习过OCR混淆表（python -m core.confusion）时，模糊匹配对形近字的替换少扣分
+    if os.path.exists(CONFUSION_PATH):
+        answer_bank.scorer = ConfusionScorer.load(CONFUSION_PATH)
+    answer_bank.prepare()
+    #只在当前窗口对应游戏的分片中匹配，未命中时再全局查找
+    shard = answer_bank.route(handler.window.title)
+    #选项区域只对配置了 "options": true 的游戏截取（data/bank_shards.json），其余只按问题匹配
+    use_options = answer_bank.uses_options(shard)
+    print(f"题库分片: {shard or '全部'}，选项联合匹配: {'开' if use_options else '关'}")
     time_delay = 0.5
+    #截图没有变化时跳过OCR
+    gate = FrameGate()
+    #题目淡入时每帧读到的开头不同，同一条目只点一次，题目区域清空（换题）后重置
+    last_clicked = None
     while True:
         
         screenshot_data = handler.capture_question_screenshot()
-        #ocr
-        question =''.join(ocr.do_ocr_ext(screenshot_data,simple=True))
+        if not gate.changed(screenshot_data):
+            time.sleep(time_delay)
+            continue
+        #ocr，开启选项联合匹配时选项区域与问题一次批量识别，问题措辞相近时靠选项区分
+        if use_options:
+            question, options = ocr.do_ocr_batch([screenshot_data, handler.capture_options_screenshot()], simple=True)
+            question, options = ''.join(question), ''.join(options)
+        else:
+            question, options = ''.join(ocr.do_ocr_ext(screenshot_data, simple=True)), ''
         if len(question)==0: 
+            last_clicked = None
             time.sleep(time_delay)
             continue
-        answer = find_best_match(results, question)
+        #题目还没显示完整时按已显示的开头匹配，答案唯一即可作答
+        candidates = answer_bank.match_prefix(question, shard=shard, options=options or None)
+        answer = candidates[0][0] if candidates else answer_bank.match(question, shard=shard, options=options or None)
         if answer is not None:
             print(answer['q'] + ' ---> ' +answer['ans'])
-            operator.click_trueorfalse(answer['ans'])
+            if (answer['q'], answer['ans']) != last_clicked:
+                operator.click_trueorfalse(answer['ans'])
+                last_clicked = (answer['q'], answer['ans'])
         else:
             print("No match found")
         time.sleep(time_delay)
         
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file